@@ -1,14 +1,24 @@
-from glob import glob
+import functools
+import hashlib
+import importlib.resources
 import os
-import pkg_resources
+import re
+import shlex
+import subprocess
 
-from tutor import hooks
+import click
+from tutor import env as tutor_env
+from tutor import exceptions, fmt, hooks
 
 from .__about__ import __version__
 
 PACKAGE_NAME = "license_manager"
 SERVICE_NAME = "license-manager"
 
+# Every `tutor` command imports this module: keep it cheap. Files are only read
+# when Tutor asks for them.
+PACKAGE_ROOT = importlib.resources.files(PACKAGE_NAME)
+
 
 ########################################
 # CONFIGURATION
@@ -38,17 +48,231 @@ hooks.Filters.CONFIG_DEFAULTS.add_items(
             "LICENSE_MANAGER_BUILT_IMAGE",
             "{{ DOCKER_REGISTRY }}{{ DOCKER_IMAGE_PREFIX }}license-manager:{{ OPENEDX_COMMON_VERSION | replace('/', '-') }}",
         ),
+        # Also tag the built image with a hash of the build inputs appended to
+        # the tag above, and skip the build when an image with that tag already
+        # exists locally. The hash is only computed by `tutor images build`,
+        # `push` and `printtag`.
+        ("LICENSE_MANAGER_CONTENT_TAG", False),
 
 
         # Optional external image. If empty => we build LICENSE_MANAGER_BUILT_IMAGE.
         ("LICENSE_MANAGER_DOCKER_IMAGE", ""),
+        # Optional Debian-based python image to build from, e.g.
+        # "docker.io/python:3.11-slim-bookworm". If empty => compile python
+        # with pyenv on top of ubuntu, which is much slower on cold builds.
+        ("LICENSE_MANAGER_PYTHON_IMAGE", ""),
+        # Extra Debian packages of the runtime image. It only installs the
+        # packages of the libraries that the python environment links against:
+        # add the ones that are loaded with ctypes/dlopen, if any.
+        ("LICENSE_MANAGER_RUNTIME_PACKAGES", []),
         ("LICENSE_MANAGER_HOST", "subscriptions.{{ LMS_HOST }}"),
         ("LICENSE_MANAGER_MYSQL_DATABASE", "license_manager"),
         ("LICENSE_MANAGER_MYSQL_USERNAME", "license_manager"),
+        # Persistent connection lifetime in seconds (0 => close after each
+        # request, None => unlimited) and liveness check before reuse.
+        ("LICENSE_MANAGER_MYSQL_CONN_MAX_AGE", 60),
+        ("LICENSE_MANAGER_MYSQL_CONN_HEALTH_CHECKS", True),
+        ("LICENSE_MANAGER_MYSQL_CONNECT_TIMEOUT", 5),
+        ("LICENSE_MANAGER_MYSQL_READ_TIMEOUT", 30),
+        ("LICENSE_MANAGER_MYSQL_WRITE_TIMEOUT", 30),
+        # Optional TLS, e.g. "REQUIRED" or "VERIFY_CA" with a CA bundle path
+        # that exists inside the container.
+        ("LICENSE_MANAGER_MYSQL_SSL_MODE", ""),
+        ("LICENSE_MANAGER_MYSQL_SSL_CA", ""),
+        # Optional MySQL read replica. When a host is set, safe reads (GET
+        # requests to the listed path prefixes, the listed Celery tasks) go to
+        # the replica while its replication lag is at most MAX_LAG seconds
+        # (0 => not checked). Clients that wrote something read from the
+        # primary for PIN_SECONDS.
+        ("LICENSE_MANAGER_MYSQL_REPLICA_HOST", ""),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_PORT", "{{ MYSQL_PORT }}"),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_USERNAME", "{{ LICENSE_MANAGER_MYSQL_USERNAME }}"),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_PASSWORD", "{{ LICENSE_MANAGER_MYSQL_PASSWORD }}"),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_MAX_LAG", 5),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_PIN_SECONDS", 10),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_PATHS", ["/api/", "/admin/"]),
+        ("LICENSE_MANAGER_MYSQL_REPLICA_CELERY_TASKS", []),
+        # Skip the MySQL bootstrap and the migrations during `tutor ... do init`
+        # when nothing changed since the previous init.
+        ("LICENSE_MANAGER_INIT_FAST_PATH", True),
         ("LICENSE_MANAGER_OAUTH2_KEY", "license-manager-key"),
         ("LICENSE_MANAGER_OAUTH2_KEY_DEV", "license-manager-key-dev"),
         ("LICENSE_MANAGER_OAUTH2_KEY_SSO", "license-manager-key-sso"),
         ("LICENSE_MANAGER_OAUTH2_KEY_SSO_DEV", "license-manager-key-sso-dev"),
+
+        # Redis-backed Django cache. The Celery broker uses Redis database 0 and
+        # the LMS cache uses database 1, so we default to database 2.
+        ("LICENSE_MANAGER_CACHE_ENABLED", True),
+        ("LICENSE_MANAGER_CACHE_REDIS_DB", 2),
+        ("LICENSE_MANAGER_CACHE_KEY_PREFIX", "license_manager"),
+        # Default cache entry TTL, in seconds
+        ("LICENSE_MANAGER_CACHE_TIMEOUT", 300),
+        ("LICENSE_MANAGER_CACHE_MAX_CONNECTIONS", 50),
+        ("LICENSE_MANAGER_CACHE_SOCKET_TIMEOUT", 5),
+        # Store sessions in the cache (backed by the database)
+        ("LICENSE_MANAGER_CACHE_SESSIONS", True),
+        # Use Django's cached template loader in production
+        ("LICENSE_MANAGER_CACHE_TEMPLATES", True),
+
+        # Serve hashed, precompressed static assets from the manifest generated
+        # at build time. Disable when running an image built without it.
+        ("LICENSE_MANAGER_STATIC_MANIFEST", True),
+        # Cache lifetime (seconds) for static files without a hash in their name
+        ("LICENSE_MANAGER_STATIC_MAX_AGE", 3600),
+
+        # Caddy: compress responses with the listed encodings, in order of
+        # preference. Tutor's shared proxy snippet only offers gzip.
+        ("LICENSE_MANAGER_CADDY_ENCODE", True),
+        ("LICENSE_MANAGER_CADDY_ENCODINGS", "zstd gzip"),
+        # Serve /static/* from a Caddy file server instead of Gunicorn/WhiteNoise
+        ("LICENSE_MANAGER_CADDY_SERVE_STATIC", False),
+
+        # Celery workers. "default" tasks (activation emails, revocations...)
+        # are short and latency-sensitive: they get their own worker that
+        # prefetches a single task at a time. The bulk_enrollment queue is
+        # consumed by a separate worker tuned for throughput.
+        # Pool: "prefork", "threads", "gevent" or "solo". Autoscale takes
+        # precedence over concurrency, as "max,min" (prefork only).
+        ("LICENSE_MANAGER_CELERY_DEFAULT_POOL", "prefork"),
+        ("LICENSE_MANAGER_CELERY_DEFAULT_CONCURRENCY", 2),
+        ("LICENSE_MANAGER_CELERY_DEFAULT_AUTOSCALE", ""),
+        ("LICENSE_MANAGER_CELERY_DEFAULT_PREFETCH_MULTIPLIER", 1),
+        ("LICENSE_MANAGER_CELERY_DEFAULT_MAX_TASKS_PER_CHILD", 1000),
+        ("LICENSE_MANAGER_CELERY_DEFAULT_ACKS_LATE", False),
+        ("LICENSE_MANAGER_CELERY_BULK_POOL", "prefork"),
+        ("LICENSE_MANAGER_CELERY_BULK_CONCURRENCY", 4),
+        ("LICENSE_MANAGER_CELERY_BULK_AUTOSCALE", ""),
+        ("LICENSE_MANAGER_CELERY_BULK_PREFETCH_MULTIPLIER", 4),
+        ("LICENSE_MANAGER_CELERY_BULK_MAX_TASKS_PER_CHILD", 100),
+        ("LICENSE_MANAGER_CELERY_BULK_ACKS_LATE", True),
+
+        # Prometheus metrics: request/database/cache metrics served at /metrics
+        # on port 8000 (not exposed by Caddy), Gunicorn saturation, and a
+        # celery-exporter service for queue lengths and task metrics.
+        ("LICENSE_MANAGER_METRICS_ENABLED", False),
+        ("LICENSE_MANAGER_METRICS_CELERY_EXPORTER_IMAGE", "docker.io/danihodovic/celery-exporter:0.10.8"),
+        # Kubernetes: also create Prometheus Operator ServiceMonitors
+        ("LICENSE_MANAGER_METRICS_SERVICE_MONITOR", False),
+        ("LICENSE_MANAGER_METRICS_SCRAPE_INTERVAL", "30s"),
+
+        # Cache verified JWT claims and the users they resolve to, in memory
+        # (MAX_ENTRIES per process) and, with SHARED, in the Redis cache.
+        # Entries expire after TTL seconds, or when the token expires.
+        ("LICENSE_MANAGER_JWT_CACHE_ENABLED", False),
+        ("LICENSE_MANAGER_JWT_CACHE_TTL", 300),
+        ("LICENSE_MANAGER_JWT_CACHE_MAX_ENTRIES", 10000),
+        ("LICENSE_MANAGER_JWT_CACHE_SHARED", True),
+
+        # Share the backend-service OAuth2 access tokens between all processes
+        # through the Redis cache (one process refreshes a token REFRESH_MARGIN
+        # seconds before it expires), and pool the connections of the API
+        # clients (POOL_MAXSIZE connections per host and process).
+        ("LICENSE_MANAGER_OAUTH_TOKEN_CACHE_ENABLED", False),
+        ("LICENSE_MANAGER_OAUTH_TOKEN_REFRESH_MARGIN", 60),
+        ("LICENSE_MANAGER_HTTP_POOL_MAXSIZE", 10),
+
+        # Logging. Structured mode writes JSON records from a background thread
+        # (bounded queue; records are dropped when it is full). Levels override
+        # the level of loggers, e.g. {"django.db.backends": "WARNING"}; sampling
+        # keeps a fraction of the records below WARNING of noisy loggers, e.g.
+        # {"edx_rest_framework_extensions": 0.1}.
+        ("LICENSE_MANAGER_LOGGING_STRUCTURED", False),
+        ("LICENSE_MANAGER_LOGGING_QUEUE_SIZE", 10000),
+        ("LICENSE_MANAGER_LOGGING_LEVELS", {}),
+        ("LICENSE_MANAGER_LOGGING_SAMPLING", {}),
+
+        # Load-test scenarios (`tutor local do benchmark`). Enabling this renders
+        # the LMS private JWT key in the settings, to sign test tokens: keep it
+        # off in production.
+        ("LICENSE_MANAGER_BENCHMARK_ENABLED", False),
+        ("LICENSE_MANAGER_API_URL", "http://license-manager:8000/api/v2"),
+
+        # On-demand cProfile profiles of requests (signed header, or "_profile"
+        # query parameter for staff users) and Celery tasks (listed names), plus
+        # a random sample of SAMPLE_RATE of them. Profiles are stored in DIR if
+        # set (a volume, mounted by `tutor local`), and in Redis otherwise.
+        ("LICENSE_MANAGER_PROFILING_ENABLED", False),
+        ("LICENSE_MANAGER_PROFILING_SAMPLE_RATE", 0),
+        ("LICENSE_MANAGER_PROFILING_CELERY_TASKS", []),
+        ("LICENSE_MANAGER_PROFILING_MAX_PROFILES", 50),
+        ("LICENSE_MANAGER_PROFILING_DIR", ""),
+
+        # Count the SQL queries and the database time of each request and Celery
+        # task, log the queries slower than SLOW_QUERY_MS (0 => never), and add
+        # a Server-Timing header to responses. A request or task that runs more
+        # queries than its budget logs a warning: budgets are keyed by URL name,
+        # URL route or task name, e.g. {"api:v1:learner-licenses-list": 10}, and
+        # default to QUERY_BUDGET (0 => no budget).
+        ("LICENSE_MANAGER_QUERY_INSTRUMENTATION", False),
+        ("LICENSE_MANAGER_SLOW_QUERY_MS", 200),
+        ("LICENSE_MANAGER_QUERY_BUDGET", 0),
+        ("LICENSE_MANAGER_QUERY_BUDGETS", {}),
+        ("LICENSE_MANAGER_SERVER_TIMING", True),
+
+        # LMS user sync (sync_lms_users). An interval in seconds runs it
+        # periodically from a license-manager-beat service; 0 => disabled.
+        # Periodic runs only process new users and users who logged in, except
+        # for a full sweep every FULL_INTERVAL seconds (0 => never), which picks
+        # up the other changes to LMS accounts.
+        ("LICENSE_MANAGER_LMS_USER_SYNC_INTERVAL", 0),
+        ("LICENSE_MANAGER_LMS_USER_SYNC_FULL_INTERVAL", 86400),
+        ("LICENSE_MANAGER_LMS_USER_SYNC_BATCH_SIZE", 1000),
+
+        # Kubernetes sizing for the web (LICENSE_MANAGER_*), default worker
+        # (LICENSE_MANAGER_WORKER_*) and bulk worker (LICENSE_MANAGER_BULK_WORKER_*)
+        # Deployments. Empty limits are not set. Gunicorn derives its worker
+        # count from the CPU limit of the web pod, or else its CPU request.
+        ("LICENSE_MANAGER_REPLICAS", 1),
+        ("LICENSE_MANAGER_CPU_REQUEST", "250m"),
+        ("LICENSE_MANAGER_CPU_LIMIT", ""),
+        ("LICENSE_MANAGER_MEMORY_REQUEST", "512Mi"),
+        ("LICENSE_MANAGER_MEMORY_LIMIT", "1Gi"),
+        ("LICENSE_MANAGER_WORKER_REPLICAS", 1),
+        ("LICENSE_MANAGER_WORKER_CPU_REQUEST", "100m"),
+        ("LICENSE_MANAGER_WORKER_CPU_LIMIT", ""),
+        ("LICENSE_MANAGER_WORKER_MEMORY_REQUEST", "384Mi"),
+        ("LICENSE_MANAGER_WORKER_MEMORY_LIMIT", "768Mi"),
+        ("LICENSE_MANAGER_BULK_WORKER_REPLICAS", 1),
+        ("LICENSE_MANAGER_BULK_WORKER_CPU_REQUEST", "250m"),
+        ("LICENSE_MANAGER_BULK_WORKER_CPU_LIMIT", ""),
+        ("LICENSE_MANAGER_BULK_WORKER_MEMORY_REQUEST", "768Mi"),
+        ("LICENSE_MANAGER_BULK_WORKER_MEMORY_LIMIT", "1536Mi"),
+        # HorizontalPodAutoscalers. The *_REPLICAS settings above become the
+        # minimum number of replicas. The web pods scale on CPU; the workers
+        # scale on queue length when an external metric is available (e.g.
+        # "celery_queue_length"), and on CPU otherwise.
+        ("LICENSE_MANAGER_AUTOSCALING", False),
+        ("LICENSE_MANAGER_MAX_REPLICAS", 4),
+        ("LICENSE_MANAGER_WORKER_MAX_REPLICAS", 4),
+        ("LICENSE_MANAGER_BULK_WORKER_MAX_REPLICAS", 4),
+        ("LICENSE_MANAGER_AUTOSCALING_CPU_UTILIZATION", 70),
+        ("LICENSE_MANAGER_AUTOSCALING_QUEUE_METRIC", ""),
+        # Target number of pending tasks per worker pod
+        ("LICENSE_MANAGER_AUTOSCALING_QUEUE_TARGET", 20),
+        # PodDisruptionBudget for the web pods
+        ("LICENSE_MANAGER_PDB_ENABLED", True),
+        ("LICENSE_MANAGER_PDB_MAX_UNAVAILABLE", 1),
+
+        # Gunicorn web server, rendered to apps/license_manager/gunicorn.conf.py
+        # Worker class: "gthread" (default), "sync" or "gevent".
+        ("LICENSE_MANAGER_GUNICORN_WORKER_CLASS", "gthread"),
+        # 0 => derive the worker count from the container's cgroup CPU quota (or
+        # its Kubernetes CPU request), capped by the container memory limit
+        # divided by WORKER_MEMORY_MB.
+        ("LICENSE_MANAGER_GUNICORN_WORKERS", 0),
+        ("LICENSE_MANAGER_GUNICORN_WORKER_MEMORY_MB", 200),
+        ("LICENSE_MANAGER_GUNICORN_THREADS", 4),
+        ("LICENSE_MANAGER_GUNICORN_WORKER_CONNECTIONS", 100),
+        ("LICENSE_MANAGER_GUNICORN_MAX_REQUESTS", 1000),
+        ("LICENSE_MANAGER_GUNICORN_MAX_REQUESTS_JITTER", 100),
+        ("LICENSE_MANAGER_GUNICORN_KEEPALIVE", 5),
+        ("LICENSE_MANAGER_GUNICORN_TIMEOUT", 60),
+        ("LICENSE_MANAGER_GUNICORN_BACKLOG", 2048),
+        # Import and warm up the application in the Gunicorn master (resp. the
+        # main Celery process) and freeze its objects before forking, so that
+        # workers share its memory. Not for the gevent worker class.
+        ("LICENSE_MANAGER_GUNICORN_PRELOAD", False),
+        ("LICENSE_MANAGER_CELERY_PRELOAD", False),
     ]
 )
 
@@ -88,31 +312,177 @@ hooks.Filters.CONFIG_OVERRIDES.add_items(
 # In Tutor v16, COMMANDS_INIT was removed. We now use CLI_DO_INIT_TASKS instead
 # and feed it the contents of our init scripts from the templates directory.
 
-def _add_init_task(service: str, *relpath: str) -> None:
+# (service, path of the script in templates/license_manager/tasks)
+INIT_TASKS = [
+    ("mysql", ("mysql", "init")),
+    ("lms", ("lms", "init")),
+    (SERVICE_NAME, ("license_manager", "init")),
+]
+
+
+@hooks.Filters.CLI_DO_INIT_TASKS.add()
+def _add_init_tasks(tasks: list[tuple[str, str]]) -> list[tuple[str, str]]:
     """
-    Helper: read a shell script from the plugin templates and register it
-    as an init task for the given service.
+    Read the init scripts from the plugin templates when Tutor runs the init
+    tasks, and not when the plugin is loaded.
     """
-    task_path = os.path.join(
-        pkg_resources.resource_filename(PACKAGE_NAME, "templates"),
-        *relpath,
-    )
-    with open(task_path, encoding="utf-8") as task_file:
-        hooks.Filters.CLI_DO_INIT_TASKS.add_item((service, task_file.read()))
-
-# To run the script from templates/license_manager/tasks/myservice/init, add:
-# These correspond to:
-#   templates/license_manager/tasks/mysql/init
-#   templates/license_manager/tasks/lms/init
-#   templates/license_manager/tasks/license_manager/init
-_add_init_task("mysql", PACKAGE_NAME, "tasks", "mysql", "init")
-_add_init_task("lms", PACKAGE_NAME, "tasks", "lms", "init")
-_add_init_task(SERVICE_NAME, PACKAGE_NAME, "tasks", "license_manager", "init")
+    for service, relpath in INIT_TASKS:
+        task_path = PACKAGE_ROOT.joinpath("templates", PACKAGE_NAME, "tasks", *relpath)
+        tasks.append((service, task_path.read_text(encoding="utf-8")))
+    return tasks
+
+
+########################################
+# DO COMMANDS
+########################################
+
+@click.command(name="sync-lms-users", help="Copy new and updated LMS users to License Manager")
+@click.option("--full", is_flag=True, help="Process all LMS users, not only the new/updated ones")
+@click.option("--batch-size", type=int, help="Number of users read and written at once")
+@click.option("--dry-run", is_flag=True, help="Count the changes without writing them")
+def sync_lms_users(full: bool, batch_size: int, dry_run: bool) -> list[tuple[str, str]]:
+    """
+    Run the sync_lms_users management command, e.g.:
+
+        tutor local do sync-lms-users
+        tutor k8s do sync-lms-users --full
+    """
+    command = "./manage.py sync_lms_users --batch-size {{ LICENSE_MANAGER_LMS_USER_SYNC_BATCH_SIZE }}"
+    if batch_size:
+        command = f"./manage.py sync_lms_users --batch-size {batch_size}"
+    if full:
+        command += " --full"
+    if dry_run:
+        command += " --dry-run"
+    return [(SERVICE_NAME, command)]
+
+
+hooks.Filters.CLI_DO_COMMANDS.add_item(sync_lms_users)
+
+
+@click.command(name="benchmark", help="Load-test the License Manager API and print the results as JSON")
+@click.option(
+    "-s", "--scenario", "scenarios", multiple=True,
+    type=click.Choice(["learner-licenses", "subscriptions", "assign", "activation"]),
+    help="Scenario to run; repeat for several (default: all)",
+)
+@click.option("-n", "--iterations", type=int, help="Number of requests of each scenario")
+@click.option("-c", "--concurrency", type=int, help="Number of concurrent clients")
+@click.option("--assign-batch-size", type=int, help="Number of emails assigned by each 'assign' request")
+@click.option("--api-url", help="Base URL of the API (default: LICENSE_MANAGER_API_URL)")
+@click.option("--in-process", is_flag=True, help="Call the views directly, with a stub of the LMS")
+@click.option("--enterprise-customer-uuid", help="Enterprise customer of the tokens")
+@click.option("--subscription-uuid", help="Subscription plan to assign and activate licenses of")
+def benchmark(
+    scenarios: tuple[str, ...],
+    iterations: int,
+    concurrency: int,
+    assign_batch_size: int,
+    api_url: str,
+    in_process: bool,
+    enterprise_customer_uuid: str,
+    subscription_uuid: str,
+) -> list[tuple[str, str]]:
+    """
+    Run the run_benchmark management command, e.g.:
+
+        tutor config save --set LICENSE_MANAGER_BENCHMARK_ENABLED=true
+        tutor local do benchmark --enterprise-customer-uuid <uuid>
+        tutor local do benchmark --in-process -s assign -s activation \\
+            --enterprise-customer-uuid <uuid> --subscription-uuid <uuid>
+    """
+    args = ["./manage.py", "run_benchmark"]
+    for scenario in scenarios:
+        args += ["--scenario", scenario]
+    for option, value in [
+        ("--iterations", iterations),
+        ("--concurrency", concurrency),
+        ("--assign-batch-size", assign_batch_size),
+        ("--api-url", api_url),
+        ("--enterprise-customer-uuid", enterprise_customer_uuid),
+        ("--subscription-uuid", subscription_uuid),
+    ]:
+        if value:
+            args += [option, str(value)]
+    if in_process:
+        args.append("--in-process")
+    return [(SERVICE_NAME, shlex.join(args))]
+
+
+hooks.Filters.CLI_DO_COMMANDS.add_item(benchmark)
 
 ########################################
 # DOCKER IMAGE MANAGEMENT
 ########################################
 
+BUILD_HASH_LABEL = "org.openedx.license-manager.build-hash"
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_version(repository: str, version: str) -> str:
+    """
+    Return the commit that `git clone --branch <version>` checks out in the
+    Dockerfile: the branch of that name, or else the tag. A version that is
+    already a commit is returned as is.
+
+    Fails when the repository cannot be reached or has no such branch or tag:
+    hashing the version name instead would reuse an image of an older commit.
+    """
+    if re.fullmatch(r"[0-9a-f]{40}", version):
+        return version
+    try:
+        output = subprocess.run(
+            ["git", "ls-remote", repository, f"refs/heads/{version}", f"refs/tags/{version}", f"refs/tags/{version}^{{}}"],
+            capture_output=True,
+            check=True,
+            text=True,
+            timeout=60,
+            env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        raise exceptions.TutorError(f"Could not resolve {repository}@{version}: {e}") from e
+    commits = {}
+    for line in output.splitlines():
+        commit, ref = line.split("\t")
+        commits[ref] = commit
+    # Annotated tags point to a tag object: "^{}" is the commit
+    for ref in [f"refs/heads/{version}", f"refs/tags/{version}^{{}}", f"refs/tags/{version}"]:
+        if ref in commits:
+            return commits[ref]
+    raise exceptions.TutorError(f"{repository} has no branch or tag named {version}")
+
+
+def build_inputs(config) -> tuple[str, str]:
+    """
+    Return (commit, hash) for the license-manager image, where commit is the
+    resolved LICENSE_MANAGER_VERSION and hash is a digest of everything the
+    build depends on: the repository and that commit, and the rendered build
+    context (the Dockerfile and the files that it copies, such as the
+    management commands and requirements/private.txt).
+    """
+    repository = config["LICENSE_MANAGER_REPOSITORY"]
+    commit = _resolve_version(repository, config["LICENSE_MANAGER_VERSION"])
+    digest = hashlib.sha256()
+    digest.update(f"{repository}\0{commit}\0".encode())
+    renderer = tutor_env.Renderer(config)
+    for template in sorted(renderer.iter_templates_in(PACKAGE_NAME, "build", "license_manager", "")):
+        content = renderer.render_template(template)
+        if isinstance(content, str):
+            content = content.encode()
+        digest.update(f"{template}\0{len(content)}\0".encode())
+        digest.update(content)
+    return commit, digest.hexdigest()[:12]
+
+
+def content_tag(config) -> tuple[str, str, str]:
+    """
+    Return (tag, commit, hash): LICENSE_MANAGER_BUILT_IMAGE with the hash of
+    the build inputs appended, e.g. "license-manager:19.0.0-0123456789ab".
+    """
+    commit, build_hash = build_inputs(config)
+    return f"{config['LICENSE_MANAGER_BUILT_IMAGE']}-{build_hash}", commit, build_hash
+
+
 # To build an image with `tutor images build license-manager`, add a Dockerfile to templates/license_manager/build/license_manager and write:
 @hooks.Filters.IMAGES_BUILD.add()
 def add_license_manager_build(images, settings):
@@ -122,23 +492,60 @@ def add_license_manager_build(images, settings):
     - If LICENSE_MANAGER_DOCKER_IMAGE is empty: build LICENSE_MANAGER_BUILT_IMAGE.
     - If LICENSE_MANAGER_DOCKER_IMAGE is set: assume the operator owns that image;
       we do NOT build anything for this service.
+
+    With LICENSE_MANAGER_CONTENT_TAG, the image is tagged and labelled with the
+    hash of its build inputs, and also tagged LICENSE_MANAGER_BUILT_IMAGE, which
+    the rendered environment uses. The code is checked out at the commit that
+    the hash was computed from, and its clone is cached until that commit
+    changes.
     """
     external_image = settings.get("LICENSE_MANAGER_DOCKER_IMAGE")
     if external_image:
         # Admin is bringing their own image; don't override it.
         return images
 
+    tag = settings["LICENSE_MANAGER_BUILT_IMAGE"]
+    build_args = ()
+    if settings["LICENSE_MANAGER_CONTENT_TAG"]:
+        tag, commit, build_hash = content_tag(settings)
+        build_args = (
+            f"--tag={settings['LICENSE_MANAGER_BUILT_IMAGE']}",
+            f"--label={BUILD_HASH_LABEL}={build_hash}",
+            f"--build-arg=LICENSE_MANAGER_COMMIT={commit}",
+        )
     images.append(
         (
             SERVICE_NAME,
             ("plugins", PACKAGE_NAME, "build", "license_manager"),
-            settings["LICENSE_MANAGER_BUILT_IMAGE"],
-            (),
+            tag,
+            build_args,
         )
     )
     return images
 
 
+@hooks.Filters.DOCKER_BUILD_COMMAND.add()
+def skip_unchanged_license_manager_build(command: list[str]) -> list[str]:
+    """
+    Content-addressed tags change with the build inputs: when an image with
+    that tag already exists locally, there is nothing to build, only the
+    LICENSE_MANAGER_BUILT_IMAGE tag to move to it. Pass --no-cache to
+    `tutor images build` to build it anyway.
+    """
+    if "--no-cache" in command or not any(arg.startswith(f"--label={BUILD_HASH_LABEL}=") for arg in command):
+        return command
+    # Tutor's tag (content-addressed) comes first, then LICENSE_MANAGER_BUILT_IMAGE
+    tag, built_image = [arg.split("=", 1)[1] for arg in command if arg.startswith("--tag=")][:2]
+    try:
+        exists = subprocess.run(["docker", "image", "inspect", tag], capture_output=True, check=False).returncode == 0
+    except OSError:
+        exists = False
+    if not exists:
+        return command
+    fmt.echo_info(f"Image {tag} is up to date, skipping the build")
+    return ["tag", tag, built_image]
+
+
 # To pull/push an image with `tutor images pull license-manager` and `tutor images push license-manager`, write:
 @hooks.Filters.IMAGES_PULL.add()
 def add_license_manager_pull(images, settings):
@@ -156,10 +563,18 @@ def add_license_manager_pull(images, settings):
         )
     return images
 
-# hooks.Filters.IMAGES_PUSH.add_item((
-#     SERVICE_NAME,
-#     "docker.io/license-manager:{{ LICENSE_MANAGER_VERSION }}",
-# )
+
+@hooks.Filters.IMAGES_PUSH.add()
+def add_license_manager_push(images, settings):
+    """
+    Allow `tutor images push license-manager` to push the image that we build,
+    with its content-addressed tag when LICENSE_MANAGER_CONTENT_TAG is set.
+    """
+    if not settings.get("LICENSE_MANAGER_DOCKER_IMAGE"):
+        if settings["LICENSE_MANAGER_CONTENT_TAG"]:
+            images.append((SERVICE_NAME, content_tag(settings)[0]))
+        images.append((SERVICE_NAME, settings["LICENSE_MANAGER_BUILT_IMAGE"]))
+    return images
 
 
 ########################################
@@ -171,7 +586,7 @@ def add_license_manager_pull(images, settings):
 hooks.Filters.ENV_TEMPLATE_ROOTS.add_items(
     # Root paths for template files, relative to the project root.
     [
-        pkg_resources.resource_filename(PACKAGE_NAME, "templates"),
+        str(PACKAGE_ROOT / "templates"),
     ]
 )
 
@@ -192,13 +607,21 @@ hooks.Filters.ENV_TEMPLATE_TARGETS.add_items(
 #  this section as-is :)
 ########################################
 
-# For each file in license_manager/patches,
-# apply a patch based on the file's name and contents.
-for path in glob(
-    os.path.join(
-        pkg_resources.resource_filename(PACKAGE_NAME, "patches"),
-        "*",
-    )
-):
-    with open(path, encoding="utf-8") as patch_file:
-        hooks.Filters.ENV_PATCHES.add_item((os.path.basename(path), patch_file.read()))
+@functools.lru_cache(maxsize=None)
+def _read_patches() -> tuple[tuple[str, str], ...]:
+    patches = []
+    for path in sorted(PACKAGE_ROOT.joinpath("patches").iterdir(), key=lambda path: path.name):
+        content = path.read_text(encoding="utf-8")
+        # Placeholders, e.g. license-manager-dockerfile
+        if content.strip():
+            patches.append((path.name, content))
+    return tuple(patches)
+
+
+# For each file in license_manager/patches, apply a patch based on the file's
+# name and contents. The files are read the first time that Tutor renders a
+# patch.
+@hooks.Filters.ENV_PATCHES.add()
+def _add_patches(patches: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    patches.extend(_read_patches())
+    return patches
@@ -0,0 +1,212 @@
+"""
+Gunicorn configuration for the license-manager web service.
+
+Rendered by the Tutor license_manager plugin from the LICENSE_MANAGER_GUNICORN_*
+settings and mounted in the license-manager container at /openedx/gunicorn.conf.py.
+"""
+{%- if LICENSE_MANAGER_GUNICORN_PRELOAD %}
+import gc
+{%- endif %}
+import math
+import os
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+import shutil
+{%- endif %}
+
+bind = "0.0.0.0:8000"
+
+# CPUs assumed when the container has neither a CPU quota nor a CPU request
+FALLBACK_CPUS = 2
+# Expected resident memory of a worker, to cap the worker count by the
+# container memory limit
+WORKER_MEMORY_MB = {{ LICENSE_MANAGER_GUNICORN_WORKER_MEMORY_MB }}
+
+
+def _cgroup_cpu_quota():
+    """
+    Return the CPU quota of this container (in CPUs) or None when it is unlimited.
+
+    os.cpu_count() returns the CPU count of the host, which wildly over-provisions
+    workers on large Kubernetes nodes or when the container is CPU-limited.
+    """
+    try:
+        # cgroup v2: "<quota> <period>", where quota may be "max"
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: quota is -1 when unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", encoding="utf-8") as cfs_quota:
+            quota = int(cfs_quota.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", encoding="utf-8") as cfs_period:
+            period = int(cfs_period.read())
+        if quota <= 0:
+            return None
+        return quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_memory_limit():
+    """
+    Return the memory limit of this container (in bytes) or None when it is unlimited.
+    """
+    try:
+        # cgroup v2: "max" when unlimited
+        with open("/sys/fs/cgroup/memory.max", encoding="utf-8") as memory_max:
+            limit = memory_max.read().strip()
+        return None if limit == "max" else int(limit)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: a huge number when unlimited
+        with open("/sys/fs/cgroup/memory/memory.limit_in_bytes", encoding="utf-8") as memory_limit:
+            limit = int(memory_limit.read())
+        return None if limit >= 2**60 else limit
+    except (OSError, ValueError):
+        return None
+
+
+def _available_cpus():
+    """
+    The CPU quota of the container, or else its CPU request (set by Kubernetes
+    from the downward API), or else FALLBACK_CPUS: never the CPU count of the
+    host, which may be a large node shared with many other pods.
+    """
+    quota = _cgroup_cpu_quota()
+    if quota:
+        return max(1, math.ceil(quota))
+    request = os.environ.get("LICENSE_MANAGER_CPU_REQUEST_MILLICORES")
+    if request and int(request) > 0:
+        return max(1, math.ceil(int(request) / 1000))
+    try:
+        return min(FALLBACK_CPUS, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return min(FALLBACK_CPUS, os.cpu_count() or 1)
+
+
+def _default_workers():
+    cpus = _available_cpus()
+    if worker_class == "sync":
+        # Classic recommendation for blocking workers
+        count = 2 * cpus + 1
+    else:
+        # Threaded/async workers already multiplex requests within a process
+        count = cpus + 1
+    # Do not start more workers than the memory limit can hold
+    memory_limit = _cgroup_memory_limit()
+    if memory_limit:
+        count = min(count, max(1, memory_limit // (WORKER_MEMORY_MB * 1024 * 1024)))
+    return count
+
+
+worker_class = "{{ LICENSE_MANAGER_GUNICORN_WORKER_CLASS }}"
+# GUNICORN_WORKERS is still honoured for backward compatibility. A value of 0
+# means "derive the worker count from the container CPU quota or request".
+workers = int(os.environ.get("GUNICORN_WORKERS") or {{ LICENSE_MANAGER_GUNICORN_WORKERS }} or _default_workers())
+# Gunicorn switches any worker class to gthread when threads > 1
+threads = {% if LICENSE_MANAGER_GUNICORN_WORKER_CLASS == "gthread" %}{{ LICENSE_MANAGER_GUNICORN_THREADS }}{% else %}1{% endif %}
+{% if LICENSE_MANAGER_GUNICORN_WORKER_CLASS == "gevent" %}worker_connections = {{ LICENSE_MANAGER_GUNICORN_WORKER_CONNECTIONS }}
+{% endif %}
+# Recycle workers periodically to contain memory leaks; the jitter avoids all
+# workers restarting at the same time.
+max_requests = {{ LICENSE_MANAGER_GUNICORN_MAX_REQUESTS }}
+max_requests_jitter = {{ LICENSE_MANAGER_GUNICORN_MAX_REQUESTS_JITTER }}
+
+keepalive = {{ LICENSE_MANAGER_GUNICORN_KEEPALIVE }}
+timeout = {{ LICENSE_MANAGER_GUNICORN_TIMEOUT }}
+graceful_timeout = {{ LICENSE_MANAGER_GUNICORN_TIMEOUT }}
+backlog = {{ LICENSE_MANAGER_GUNICORN_BACKLOG }}
+{%- if LICENSE_MANAGER_GUNICORN_PRELOAD %}
+
+# Preload: the master imports and warms up the application, and the workers
+# share its memory. The garbage collector is disabled while the application is
+# imported, so that it does not leave holes in the pages to share, and the
+# objects of the master are frozen before each fork (see
+# license_manager/apps/tutor/preload.py).
+preload_app = True
+gc.disable()
+
+
+def when_ready(server):
+    from license_manager.apps.tutor import preload
+
+    preload.warm_up()
+    preload.close_connections()
+    preload.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # Objects created by the master since the previous fork
+    gc.freeze()
+{%- endif %}
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+
+# Prometheus: every worker process writes its metrics to files in
+# PROMETHEUS_MULTIPROC_DIR, which /metrics aggregates. The variable must be set
+# before the workers import prometheus_client.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus")
+{%- if LICENSE_MANAGER_GUNICORN_PRELOAD %}
+# The master imports prometheus_client before on_starting when preloading
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+{%- endif %}
+
+
+def on_starting(server):
+    # Files left by a previous run would be aggregated with the new ones
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+{%- endif %}
+{%- if LICENSE_MANAGER_GUNICORN_PRELOAD or LICENSE_MANAGER_METRICS_ENABLED %}
+
+
+def post_fork(server, worker):
+{%- if LICENSE_MANAGER_GUNICORN_PRELOAD %}
+    from license_manager.apps.tutor import preload
+
+    # Drop the connection pools inherited from the master
+    preload.close_connections()
+{%- endif %}
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+    from prometheus_client import Gauge
+
+    # Saturation = gunicorn_requests_in_progress / gunicorn_request_slots
+    worker.prometheus_slots = Gauge(
+        "gunicorn_request_slots",
+        "Number of requests that live workers can process concurrently",
+        multiprocess_mode="livesum",
+    )
+    if "gevent" in worker.cfg.worker_class_str:
+        worker.prometheus_slots.set(worker.cfg.worker_connections)
+    else:
+        worker.prometheus_slots.set(worker.cfg.threads)
+    worker.prometheus_in_progress = Gauge(
+        "gunicorn_requests_in_progress",
+        "Number of requests being processed by live workers",
+        multiprocess_mode="livesum",
+    )
+{%- endif %}
+{%- endif %}
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+
+
+def pre_request(worker, req):
+    worker.prometheus_in_progress.inc()
+
+
+def post_request(worker, req, environ, resp):
+    worker.prometheus_in_progress.dec()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+{%- endif %}
+
+{{ patch("license-manager-gunicorn-conf") }}
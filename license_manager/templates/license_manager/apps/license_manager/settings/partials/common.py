@@ -1,4 +1,5 @@
 import json
+import os
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
@@ -8,17 +9,115 @@ DEBUG = False
 # Set this value in the environment-specific files (e.g. local.py, production.py, test.py)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "{% if LICENSE_MANAGER_METRICS_ENABLED %}django_prometheus.db.backends.mysql{% else %}django.db.backends.mysql{% endif %}",
         "NAME": "{{ LICENSE_MANAGER_MYSQL_DATABASE }}",
         "USER": "{{ LICENSE_MANAGER_MYSQL_USERNAME }}",
         "PASSWORD": "{{ LICENSE_MANAGER_MYSQL_PASSWORD }}",
         "HOST": "{{ MYSQL_HOST }}",
         "PORT": "{{ MYSQL_PORT }}",
+        # Keep connections open across requests/tasks instead of paying a new
+        # TCP + auth handshake every time, and ping them before reuse.
+        "CONN_MAX_AGE": {{ LICENSE_MANAGER_MYSQL_CONN_MAX_AGE }},
+        "CONN_HEALTH_CHECKS": {{ LICENSE_MANAGER_MYSQL_CONN_HEALTH_CHECKS }},
         "OPTIONS": {
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            "connect_timeout": {{ LICENSE_MANAGER_MYSQL_CONNECT_TIMEOUT }},
+            "read_timeout": {{ LICENSE_MANAGER_MYSQL_READ_TIMEOUT }},
+            "write_timeout": {{ LICENSE_MANAGER_MYSQL_WRITE_TIMEOUT }},
+            {%- if LICENSE_MANAGER_MYSQL_SSL_MODE %}
+            "ssl_mode": "{{ LICENSE_MANAGER_MYSQL_SSL_MODE }}",
+            {%- endif %}
+            {%- if LICENSE_MANAGER_MYSQL_SSL_CA %}
+            "ssl": {"ca": "{{ LICENSE_MANAGER_MYSQL_SSL_CA }}"},
+            {%- endif %}
         },
     }
 }
+# Read-only access to the LMS user tables, used by the sync_lms_users command.
+# Nothing else uses this alias, so no connection is opened unless it is needed.
+DATABASES["lms"] = dict(
+    DATABASES["default"],
+    NAME="{{ OPENEDX_MYSQL_DATABASE }}",
+    OPTIONS=dict(DATABASES["default"]["OPTIONS"]),
+)
+{%- if LICENSE_MANAGER_MYSQL_REPLICA_HOST %}
+# Read replica: see license_manager/apps/tutor/routers.py for what is read from
+# it. Tests use the primary database for both aliases.
+DATABASES["read_replica"] = dict(
+    DATABASES["default"],
+    HOST="{{ LICENSE_MANAGER_MYSQL_REPLICA_HOST }}",
+    PORT="{{ LICENSE_MANAGER_MYSQL_REPLICA_PORT }}",
+    USER="{{ LICENSE_MANAGER_MYSQL_REPLICA_USERNAME }}",
+    PASSWORD="{{ LICENSE_MANAGER_MYSQL_REPLICA_PASSWORD }}",
+    OPTIONS=dict(DATABASES["default"]["OPTIONS"]),
+    TEST={"MIRROR": "default"},
+)
+DATABASE_ROUTERS = list(globals().get("DATABASE_ROUTERS", [])) + [
+    "license_manager.apps.tutor.routers.ReadReplicaRouter"
+]
+TUTOR_READ_REPLICA = {
+    "MAX_LAG": {{ LICENSE_MANAGER_MYSQL_REPLICA_MAX_LAG }},
+    "LAG_CHECK_INTERVAL": 5,
+    "PIN_SECONDS": {{ LICENSE_MANAGER_MYSQL_REPLICA_PIN_SECONDS }},
+    "PATHS": {{ LICENSE_MANAGER_MYSQL_REPLICA_PATHS }},
+    "CELERY_TASKS": {{ LICENSE_MANAGER_MYSQL_REPLICA_CELERY_TASKS }},
+}
+{%- endif %}
+
+INSTALLED_APPS = list(INSTALLED_APPS) + ["license_manager.apps.tutor"]
+
+{% if LICENSE_MANAGER_CACHE_ENABLED %}
+# Cache
+# Redis is already available to every license-manager container for Celery; use
+# a separate logical database so that cache keys never mix with broker queues.
+CACHES = {
+    "default": {
+        "BACKEND": "{% if LICENSE_MANAGER_METRICS_ENABLED %}django_prometheus.cache.backends.redis.NativeRedisCache{% else %}django.core.cache.backends.redis.RedisCache{% endif %}",
+        "LOCATION": "redis://{% if REDIS_PASSWORD %}{{ REDIS_USERNAME }}:{{ REDIS_PASSWORD }}@{% endif %}{{ REDIS_HOST }}:{{ REDIS_PORT }}/{{ LICENSE_MANAGER_CACHE_REDIS_DB }}",
+        "KEY_PREFIX": "{{ LICENSE_MANAGER_CACHE_KEY_PREFIX }}",
+        "TIMEOUT": {{ LICENSE_MANAGER_CACHE_TIMEOUT }},
+        "OPTIONS": {
+            "max_connections": {{ LICENSE_MANAGER_CACHE_MAX_CONNECTIONS }},
+            "socket_connect_timeout": {{ LICENSE_MANAGER_CACHE_SOCKET_TIMEOUT }},
+            "socket_timeout": {{ LICENSE_MANAGER_CACHE_SOCKET_TIMEOUT }},
+        },
+    }
+}
+{% if LICENSE_MANAGER_CACHE_SESSIONS %}
+# Read sessions from the cache and only fall back to the database on a miss.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "default"
+{% endif %}
+{% endif %}
+
+# Celery
+# Each worker (default and bulk_enrollment) sets LICENSE_MANAGER_CELERY_ACKS_LATE
+# from its own LICENSE_MANAGER_CELERY_*_ACKS_LATE setting. With late acks, a
+# task that was interrupted by a worker restart is delivered again.
+CELERY_TASK_ACKS_LATE = os.environ.get("LICENSE_MANAGER_CELERY_ACKS_LATE") == "true"
+{%- if LICENSE_MANAGER_CELERY_PRELOAD %}
+# Warm up the main process of the workers and freeze its objects before the
+# prefork pool starts, see license_manager/apps/tutor/preload.py
+TUTOR_CELERY_PRELOAD = True
+{%- endif %}
+{%- if LICENSE_MANAGER_LMS_USER_SYNC_INTERVAL %}
+# Periodic LMS user sync, run by license-manager-beat on the bulk worker
+CELERY_BEAT_SCHEDULE = dict(globals().get("CELERY_BEAT_SCHEDULE", {}))
+CELERY_BEAT_SCHEDULE["tutor-sync-lms-users"] = {
+    "task": "license_manager.apps.tutor.tasks.sync_lms_users",
+    "schedule": {{ LICENSE_MANAGER_LMS_USER_SYNC_INTERVAL }},
+    "kwargs": {
+        "batch_size": {{ LICENSE_MANAGER_LMS_USER_SYNC_BATCH_SIZE }},
+        "full_every": {{ LICENSE_MANAGER_LMS_USER_SYNC_FULL_INTERVAL }},
+    },
+    "options": {"queue": "license_manager.bulk_enrollment"},
+}
+{%- endif %}
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+# Task events are consumed by the celery-exporter service
+CELERY_WORKER_SEND_TASK_EVENTS = True
+CELERY_TASK_SEND_SENT_EVENT = True
+{%- endif %}
 
 LANGUAGE_CODE = 'en-us'
 
@@ -49,6 +148,15 @@ SOCIAL_AUTH_EDX_OAUTH2_LOGOUT_URL = SOCIAL_AUTH_EDX_OAUTH2_ISSUER + "/logout"
 BACKEND_SERVICE_EDX_OAUTH2_KEY = "license-manager-key"
 BACKEND_SERVICE_EDX_OAUTH2_SECRET = "{{ LICENSE_MANAGER_OAUTH2_SECRET }}"
 BACKEND_SERVICE_EDX_OAUTH2_PROVIDER_URL = "http://lms:8000/oauth2"
+{%- if LICENSE_MANAGER_OAUTH_TOKEN_CACHE_ENABLED %}
+# One access token for all processes, and pooled connections for the API
+# clients, see license_manager/apps/tutor/oauth.py
+TUTOR_OAUTH = {
+    "REFRESH_MARGIN": {{ LICENSE_MANAGER_OAUTH_TOKEN_REFRESH_MARGIN }},
+    "POOL_MAXSIZE": {{ LICENSE_MANAGER_HTTP_POOL_MAXSIZE }},
+    "METRICS": {{ LICENSE_MANAGER_METRICS_ENABLED }},
+}
+{%- endif %}
 
 
 {% set jwt_rsa_key | rsa_import_key %}{{ JWT_RSA_PRIVATE_KEY }}{% endset %}
@@ -74,6 +182,56 @@ JWT_AUTH["JWT_ISSUERS"] = [
         "SECRET_KEY": "{{ OPENEDX_SECRET_KEY }}"
     }
 ]
+{%- if LICENSE_MANAGER_JWT_CACHE_ENABLED %}
+# Skip the signature verification and the user lookup of recently seen tokens,
+# see license_manager/apps/tutor/jwt_cache.py
+TUTOR_JWT_CACHE = {
+    "DECODE_HANDLER": JWT_AUTH.get(
+        "JWT_DECODE_HANDLER", "edx_rest_framework_extensions.auth.jwt.decoder.jwt_decode_handler"
+    ),
+    "TTL": {{ LICENSE_MANAGER_JWT_CACHE_TTL }},
+    "MAX_ENTRIES": {{ LICENSE_MANAGER_JWT_CACHE_MAX_ENTRIES }},
+    "SHARED": {{ LICENSE_MANAGER_JWT_CACHE_SHARED and LICENSE_MANAGER_CACHE_ENABLED }},
+}
+JWT_AUTH["JWT_DECODE_HANDLER"] = "license_manager.apps.tutor.jwt_cache.cached_jwt_decode_handler"
+REST_FRAMEWORK = dict(globals().get("REST_FRAMEWORK", {}))
+REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"] = [
+    "license_manager.apps.tutor.authentication.CachedJwtAuthentication"
+    if authentication_class == "edx_rest_framework_extensions.auth.jwt.authentication.JwtAuthentication"
+    else authentication_class
+    for authentication_class in REST_FRAMEWORK.get("DEFAULT_AUTHENTICATION_CLASSES", [])
+]
+{%- endif %}
+{%- if LICENSE_MANAGER_BENCHMARK_ENABLED %}
+# Load-test scenarios (./manage.py run_benchmark) sign their JWTs with the LMS
+# private key, see license_manager/apps/tutor/benchmark
+TUTOR_BENCHMARK = {
+    "JWT_PRIVATE_KEY": """{{ JWT_RSA_PRIVATE_KEY }}""",
+    "API_URL": "{{ LICENSE_MANAGER_API_URL }}",
+}
+{%- endif %}
+{%- if LICENSE_MANAGER_PROFILING_ENABLED %}
+# On-demand cProfile profiles of requests and Celery tasks, see
+# license_manager/apps/tutor/profiling.py and ./manage.py profiles
+TUTOR_PROFILING = {
+    "SAMPLE_RATE": {{ LICENSE_MANAGER_PROFILING_SAMPLE_RATE }},
+    "CELERY_TASKS": {{ LICENSE_MANAGER_PROFILING_CELERY_TASKS }},
+    "MAX_PROFILES": {{ LICENSE_MANAGER_PROFILING_MAX_PROFILES }},
+    "DIR": "{{ LICENSE_MANAGER_PROFILING_DIR }}",
+    "REDIS_URL": "redis://{% if REDIS_PASSWORD %}{{ REDIS_USERNAME }}:{{ REDIS_PASSWORD }}@{% endif %}{{ REDIS_HOST }}:{{ REDIS_PORT }}/{{ LICENSE_MANAGER_CACHE_REDIS_DB }}",
+    "REDIS_KEY": "{{ LICENSE_MANAGER_CACHE_KEY_PREFIX }}:profiles",
+}
+{%- endif %}
+{%- if LICENSE_MANAGER_QUERY_INSTRUMENTATION %}
+# Query counts, database time, slow queries and query budgets per request and
+# per Celery task, see license_manager/apps/tutor/queries.py
+TUTOR_QUERIES = {
+    "SLOW_QUERY_MS": {{ LICENSE_MANAGER_SLOW_QUERY_MS }},
+    "BUDGETS": {{ LICENSE_MANAGER_QUERY_BUDGETS }},
+    "DEFAULT_BUDGET": {{ LICENSE_MANAGER_QUERY_BUDGET }},
+    "SERVER_TIMING": {{ LICENSE_MANAGER_SERVER_TIMING }},
+}
+{%- endif %}
 
 
 EDX_DRF_EXTENSIONS = {
@@ -100,6 +258,24 @@ try:
             logger["handlers"].remove("local")
 except Exception:
     pass
+{%- if LICENSE_MANAGER_LOGGING_STRUCTURED or LICENSE_MANAGER_LOGGING_LEVELS or LICENSE_MANAGER_LOGGING_SAMPLING %}
+
+# JSON records written from a background thread, per-logger levels and sampling
+from license_manager.apps.tutor.logs import configure as configure_logging
+
+LOGGING = configure_logging(
+    LOGGING,
+    structured={{ LICENSE_MANAGER_LOGGING_STRUCTURED }},
+    queue_size={{ LICENSE_MANAGER_LOGGING_QUEUE_SIZE }},
+    levels={{ LICENSE_MANAGER_LOGGING_LEVELS }},
+    sampling={{ LICENSE_MANAGER_LOGGING_SAMPLING }},
+)
+{%- endif %}
+{%- if LICENSE_MANAGER_LOGGING_STRUCTURED %}
+# Celery workers keep the LOGGING configuration instead of replacing the root
+# logger handlers with their own.
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+{%- endif %}
 
 
 {{ patch("license-manager-settings-common") }}
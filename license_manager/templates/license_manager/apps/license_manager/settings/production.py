@@ -18,19 +18,91 @@ except ValueError:
     security_index = -1
 
 MIDDLEWARE.insert(security_index + 1, "whitenoise.middleware.WhiteNoiseMiddleware")
+# Kubernetes readiness/liveness probes are answered before any other middleware.
+MIDDLEWARE.insert(0, "license_manager.apps.tutor.middleware.HealthCheckMiddleware")
+{%- if LICENSE_MANAGER_PROFILING_ENABLED %}
+# Profiles the requests that ask for it, and a random sample of the others.
+# After AuthenticationMiddleware, which sets the request.user that the
+# _profile query parameter requires to be staff.
+try:
+    authentication_index = MIDDLEWARE.index("django.contrib.auth.middleware.AuthenticationMiddleware")
+except ValueError:
+    authentication_index = len(MIDDLEWARE) - 1
+MIDDLEWARE.insert(authentication_index + 1, "license_manager.apps.tutor.profiling.ProfilingMiddleware")
+{%- endif %}
+{%- if LICENSE_MANAGER_QUERY_INSTRUMENTATION %}
+# Counts the queries of every middleware and view after the health checks
+MIDDLEWARE.insert(1, "license_manager.apps.tutor.queries.QueryInstrumentationMiddleware")
+{%- endif %}
+{%- if LICENSE_MANAGER_METRICS_ENABLED %}
+# Prometheus: /metrics is served right after the health checks, then the
+# Before/After middleware pair times everything else. Database and cache
+# metrics come from the django_prometheus backends in DATABASES and CACHES.
+MIDDLEWARE.insert(1, "license_manager.apps.tutor.middleware.PrometheusMetricsMiddleware")
+MIDDLEWARE.insert(2, "django_prometheus.middleware.PrometheusBeforeMiddleware")
+MIDDLEWARE.append("django_prometheus.middleware.PrometheusAfterMiddleware")
+INSTALLED_APPS = list(INSTALLED_APPS) + ["django_prometheus"]
+{%- endif %}
+{%- if LICENSE_MANAGER_MYSQL_REPLICA_HOST %}
+# Wraps every middleware that may query the database (sessions, authentication)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("license_manager.apps.tutor.middleware.HealthCheckMiddleware") + 1,
+    "license_manager.apps.tutor.routers.ReadReplicaMiddleware",
+)
+{%- endif %}
 MIDDLEWARE = tuple(MIDDLEWARE)
 
-# For now, avoid manifest-based storage to get rid of
-# "Missing staticfiles manifest entry" errors.
+# Must match STATIC_ROOT in the image build settings (build/license_manager/assets.py),
+# where collectstatic writes the manifest and the compressed variants.
+STATIC_ROOT = "/openedx/staticfiles"
+
 # Django 4.2+: use STORAGES instead of STATICFILES_STORAGE (they are mutually exclusive).
 # Keep existing STORAGES (including "default") and override only "staticfiles".
 STORAGES = dict(globals().get("STORAGES", {}))
+{% if LICENSE_MANAGER_STATIC_MANIFEST %}
+# Hashed file names from the manifest generated at build time. WhiteNoise serves
+# hashed files with a far-future "immutable" Cache-Control header.
+STORAGES["staticfiles"] = {
+    "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+}
+# Render a plain URL instead of raising when an asset is missing from the manifest.
+WHITENOISE_MANIFEST_STRICT = False
+# Only serve what collectstatic produced; never walk the finders at request time.
+WHITENOISE_USE_FINDERS = False
+{% else %}
+# Avoid manifest-based storage, e.g. when running an image built without the
+# manifest, to get rid of "Missing staticfiles manifest entry" errors.
 STORAGES["staticfiles"] = {
     "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
 }
-
 # Let WhiteNoise fall back to Django finders (fine for dev)
 WHITENOISE_USE_FINDERS = True
+{% endif %}
+# Cache lifetime of static files whose names are not hashed
+WHITENOISE_MAX_AGE = {{ LICENSE_MANAGER_STATIC_MAX_AGE }}
+
+{% if LICENSE_MANAGER_CACHE_TEMPLATES %}
+# -------------------------------------------------------------------
+# Cached template loading: compile each template once per process.
+# APP_DIRS and an explicit "loaders" option are mutually exclusive, so
+# APP_DIRS is translated into the equivalent app_directories loader.
+# -------------------------------------------------------------------
+for template_engine in TEMPLATES:
+    if template_engine["BACKEND"] != "django.template.backends.django.DjangoTemplates":
+        continue
+    template_options = template_engine.setdefault("OPTIONS", {})
+    template_loaders = template_options.get("loaders")
+    if template_loaders is None:
+        template_loaders = ["django.template.loaders.filesystem.Loader"]
+        if template_engine.get("APP_DIRS"):
+            template_loaders.append("django.template.loaders.app_directories.Loader")
+    already_cached = isinstance(template_loaders[0], (list, tuple)) and (
+        template_loaders[0][0] == "django.template.loaders.cached.Loader"
+    )
+    if not already_cached:
+        template_options["loaders"] = [("django.template.loaders.cached.Loader", template_loaders)]
+    template_engine.pop("APP_DIRS", None)
+{% endif %}
 
 # -------------------------------------------------------------------
 # CORS / CSRF / OAuth config for Tutor
@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Measure the cost of opening a new database connection versus reusing one.
+
+    Run it from inside the license-manager container to quantify what
+    CONN_MAX_AGE (LICENSE_MANAGER_MYSQL_CONN_MAX_AGE) saves on every request
+    and Celery task against the configured MySQL host.
+
+    Usage:
+        ./manage.py benchmark_db_connections
+        ./manage.py benchmark_db_connections --iterations 200 --database default
+    """
+
+    help = "Compare new-connection vs. reused-connection latency for a database alias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Number of queries to time for each scenario (default: 50).",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to benchmark (default: %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        alias = options["database"]
+
+        if iterations < 1:
+            raise CommandError("--iterations must be a positive integer.")
+        if alias not in connections:
+            raise CommandError(f"Unknown database alias '{alias}'.")
+
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f"Database '{alias}' on {settings_dict['HOST']}:{settings_dict['PORT']} "
+            f"(CONN_MAX_AGE={settings_dict.get('CONN_MAX_AGE')}, "
+            f"CONN_HEALTH_CHECKS={settings_dict.get('CONN_HEALTH_CHECKS')})"
+        )
+
+        def timed_query():
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return (time.perf_counter() - started) * 1000
+
+        new_connection = []
+        for _ in range(iterations):
+            connection.close()
+            new_connection.append(timed_query())
+
+        # The connection is open at this point; every query below reuses it.
+        reused_connection = [timed_query() for _ in range(iterations)]
+        connection.close()
+
+        self._report("new connection + SELECT 1", new_connection)
+        self._report("reused connection + SELECT 1", reused_connection)
+
+        saved = statistics.median(new_connection) - statistics.median(reused_connection)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reusing connections saves ~{saved:.2f} ms per request/task "
+                f"({statistics.median(new_connection) / statistics.median(reused_connection):.1f}x faster)."
+            )
+        )
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label:<30} min={timings[0]:.2f} ms  median={statistics.median(timings):.2f} ms  "
+            f"p95={p95:.2f} ms  max={timings[-1]:.2f} ms"
+        )
@@ -0,0 +1,110 @@
+import time
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from license_manager.apps.tutor import jwt_cache
+from license_manager.apps.tutor.authentication import CachedJwtAuthentication
+
+
+class Command(BaseCommand):
+    """
+    Measure JWT authentication throughput with the JWT cache on and off.
+
+    A token is signed for --username (the user is created by the first
+    authentication if it does not exist), then authenticated repeatedly the
+    way an API request would be, through CachedJwtAuthentication. Requires
+    LICENSE_MANAGER_JWT_CACHE_ENABLED.
+
+    By default the token is signed with the issuer's shared secret (HS256).
+    Pass the LMS private RSA key (JWT_RSA_PRIVATE_KEY in Tutor) with
+    --rsa-private-key to measure the RS512 signature verification of
+    production tokens.
+
+    Usage:
+        ./manage.py benchmark_jwt_auth
+        ./manage.py benchmark_jwt_auth --iterations 2000 --rsa-private-key /tmp/jwt.pem
+    """
+
+    help = "Compare JWT authentication requests/sec with and without the JWT cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=500,
+            help="Number of authentications for each scenario (default: 500).",
+        )
+        parser.add_argument(
+            "--username",
+            default="jwt-benchmark",
+            help="Username claim of the token (default: %(default)s).",
+        )
+        parser.add_argument(
+            "--rsa-private-key",
+            dest="rsa_private_key",
+            help="PEM file of the private key of the 'openedx' JWK, to sign RS512 tokens.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        if iterations < 1:
+            raise CommandError("--iterations must be a positive integer.")
+        if not getattr(settings, "TUTOR_JWT_CACHE", None):
+            raise CommandError("The JWT cache is not enabled (LICENSE_MANAGER_JWT_CACHE_ENABLED).")
+
+        token = self._token(options["username"], options["rsa_private_key"])
+        request = RequestFactory().get("/api/v1/", HTTP_AUTHORIZATION=f"JWT {token}")
+        authentication = CachedJwtAuthentication()
+
+        def authenticate():
+            user, __ = authentication.authenticate(Request(request))
+            return user
+
+        # Warm up: create the user and the database connection
+        authenticate()
+
+        results = {}
+        with jwt_cache.bypass():
+            results["cache off"] = self._time(authenticate, iterations)
+        results["cache on"] = self._time(authenticate, iterations)
+
+        for label, elapsed in results.items():
+            self.stdout.write(
+                f"{label:>9}: {iterations / elapsed:9.1f} req/s "
+                f"({elapsed / iterations * 1000:.3f} ms per authentication)"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Speed-up: {results['cache off'] / results['cache on']:.1f}x "
+                f"(stats: {jwt_cache.stats()})"
+            )
+        )
+
+    def _token(self, username, rsa_private_key):
+        jwt_auth = settings.JWT_AUTH
+        now = int(time.time())
+        payload = {
+            "iss": jwt_auth["JWT_ISSUER"],
+            "aud": jwt_auth["JWT_AUDIENCE"],
+            "iat": now,
+            "exp": now + 3600,
+            "preferred_username": username,
+            "email": f"{username}@example.com",
+            "administrator": False,
+            "version": "1.2.0",
+            "scopes": ["user_id", "email", "profile"],
+        }
+        if rsa_private_key:
+            with open(rsa_private_key, encoding="utf-8") as key_file:
+                return jwt.encode(payload, key_file.read(), algorithm="RS512", headers={"kid": "openedx"})
+        return jwt.encode(payload, jwt_auth["JWT_ISSUERS"][0]["SECRET_KEY"], algorithm="HS256")
+
+    def _time(self, function, iterations):
+        started = time.perf_counter()
+        for __ in range(iterations):
+            function()
+        return time.perf_counter() - started
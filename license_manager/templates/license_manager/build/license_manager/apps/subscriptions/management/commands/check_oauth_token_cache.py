@@ -0,0 +1,95 @@
+import multiprocessing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from edx_rest_api_client.client import OAuthAPIClient
+
+from license_manager.apps.tutor import oauth
+
+
+def _authenticate(calls, results):
+    for __ in range(calls):
+        OAuthAPIClient(
+            settings.BACKEND_SERVICE_EDX_OAUTH2_PROVIDER_URL,
+            settings.BACKEND_SERVICE_EDX_OAUTH2_KEY,
+            settings.BACKEND_SERVICE_EDX_OAUTH2_SECRET,
+        ).get_jwt_access_token()
+    results.put(oauth.stats())
+
+
+class Command(BaseCommand):
+    """
+    Check that backend-service OAuth2 tokens are shared between processes.
+
+    Starts --processes processes at once, like Celery processes after a
+    restart, that each create --calls API clients and request an access
+    token. With the shared token cache, a single token is fetched from the
+    LMS in total. Use --flush to remove the cached token first.
+
+    Usage:
+        ./manage.py check_oauth_token_cache
+        ./manage.py check_oauth_token_cache --processes 16 --flush
+    """
+
+    help = "Count the OAuth2 token fetches of concurrent processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=8,
+            help="Number of concurrent processes (default: 8).",
+        )
+        parser.add_argument(
+            "--calls",
+            type=int,
+            default=5,
+            help="Number of API clients created by each process (default: 5).",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete the shared tokens first, so that one has to be fetched.",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "TUTOR_OAUTH", None):
+            raise CommandError(
+                "The shared token cache is not enabled (LICENSE_MANAGER_OAUTH_TOKEN_CACHE_ENABLED)."
+            )
+        if options["processes"] < 1 or options["calls"] < 1:
+            raise CommandError("--processes and --calls must be positive integers.")
+        if options["flush"]:
+            cache.delete(
+                oauth.token_cache_key(
+                    settings.BACKEND_SERVICE_EDX_OAUTH2_PROVIDER_URL,
+                    settings.BACKEND_SERVICE_EDX_OAUTH2_KEY,
+                )
+            )
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(target=_authenticate, args=(options["calls"], results))
+            for __ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        stats = [results.get() for __ in processes]
+        for process in processes:
+            process.join()
+
+        for process_stats in sorted(stats, key=lambda item: item["pid"]):
+            self.stdout.write(
+                f"  process {process_stats['pid']}: {process_stats['token_fetches']} fetches, "
+                f"{process_stats['token_hits']} cache hits, {process_stats['lock_waits']} lock waits, "
+                f"{process_stats['connections']} connections"
+            )
+        fetches = sum(process_stats["token_fetches"] for process_stats in stats)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{fetches} token fetches for {len(stats) * options['calls']} clients "
+                f"in {len(stats)} processes."
+            )
+        )
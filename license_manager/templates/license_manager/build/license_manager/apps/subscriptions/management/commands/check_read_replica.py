@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, router, transaction
+
+from license_manager.apps.tutor import routers
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Check the read replica configuration (LICENSE_MANAGER_MYSQL_REPLICA_*).
+
+    Prints the replication lag and where reads are routed in each context:
+    outside of a replica context, in a replica context, after a write and
+    inside a transaction. Exits with an error when the router does not behave
+    as expected, or with --require-replica when reads cannot use the replica.
+
+    Usage:
+        ./manage.py check_read_replica
+        ./manage.py check_read_replica --require-replica
+    """
+
+    help = "Check the replication lag and the routing of the read replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--require-replica",
+            action="store_true",
+            dest="require_replica",
+            help="Fail if the replica is unhealthy and reads go to the primary.",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "TUTOR_READ_REPLICA", None):
+            raise CommandError("No read replica is configured (LICENSE_MANAGER_MYSQL_REPLICA_HOST).")
+
+        config = settings.TUTOR_READ_REPLICA
+        self.stdout.write(
+            f"max lag: {config['MAX_LAG']}s, client pinned to the primary for "
+            f"{config['PIN_SECONDS']}s after a write, paths: {', '.join(config['PATHS'])}"
+        )
+        try:
+            lag = routers.replication_lag()
+        except DatabaseError as e:
+            raise CommandError(f"Could not query the read replica: {e}") from e
+        self.stdout.write(f"replication lag: {'stopped' if lag is None else f'{lag}s'}")
+
+        replica_alias = routers.REPLICA_ALIAS if routers.replica_is_healthy() else DEFAULT_DB_ALIAS
+        checks = []
+        checks.append(("outside of a replica context", router.db_for_read(User), DEFAULT_DB_ALIAS))
+        with routers.replica_reads():
+            checks.append(("replica context", router.db_for_read(User), replica_alias))
+            with transaction.atomic():
+                checks.append(("inside a transaction", router.db_for_read(User), DEFAULT_DB_ALIAS))
+            checks.append(("write", router.db_for_write(User), DEFAULT_DB_ALIAS))
+            checks.append(("read after a write", router.db_for_read(User), DEFAULT_DB_ALIAS))
+
+        failed = False
+        for label, alias, expected in checks:
+            status = "ok" if alias == expected else f"FAILED, expected {expected}"
+            failed = failed or alias != expected
+            self.stdout.write(f"  {label}: {alias} ({status})")
+        if failed:
+            raise CommandError("The read replica router does not route queries as expected.")
+
+        # Make sure the replica actually answers queries on the same schema
+        count = User.objects.using(routers.REPLICA_ALIAS).count()
+        self.stdout.write(f"users on the replica: {count}")
+        if options["require_replica"] and replica_alias != routers.REPLICA_ALIAS:
+            raise CommandError("Reads currently go to the primary: the replica is unhealthy.")
+        self.stdout.write(self.style.SUCCESS("Read replica routing is OK."))
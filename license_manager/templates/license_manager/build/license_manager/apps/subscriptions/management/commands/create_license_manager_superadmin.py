@@ -1,5 +1,11 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from license_manager.apps.tutor.bulk import ReadError, Throughput, read_chunks
 
 User = get_user_model()
 
@@ -24,6 +30,17 @@ class Command(BaseCommand):
 
         # Interactive (will prompt)
         ./manage.py create_license_manager_superadmin
+
+        # Bulk: one superadmin per CSV row (header: username,email[,password])
+        # or JSONL object. Preview the changes first with --dry-run.
+        ./manage.py create_license_manager_superadmin --from-file admins.csv --dry-run
+        ./manage.py create_license_manager_superadmin --from-file admins.jsonl --batch-size 200
+
+    In bulk mode, existing users are fetched with one query per batch and
+    written with bulk_create/bulk_update in one transaction per batch. Rows
+    without a password create SSO-only users; the password of existing users
+    is left untouched unless --no-password is given. Note that bulk writes do
+    not call User.save() and do not send pre_save/post_save signals.
     """
 
     help = "Create or update a superadmin user for License Manager."
@@ -51,8 +68,50 @@ class Command(BaseCommand):
             help="Create the superadmin without setting a usable password "
                  "(SSO-only login).",
         )
+        parser.add_argument(
+            "--from-file",
+            dest="from_file",
+            help="Create or update the superadmins listed in a CSV or JSONL file "
+                 "('-' reads standard input) with username, email and optional "
+                 "password fields.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            dest="file_format",
+            help="Format of --from-file (default: guessed from the file extension, "
+                 "csv otherwise).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            dest="batch_size",
+            help="Number of rows read, queried and written at once (default: 500).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            help="With --from-file: print the changes without writing them.",
+        )
 
     def handle(self, *args, **options):
+        if options.get("from_file"):
+            if options.get("username") or options.get("email") or options.get("password"):
+                raise CommandError(
+                    "--from-file cannot be combined with --username, --email or --password."
+                )
+            self.handle_file(
+                options["from_file"],
+                file_format=options.get("file_format"),
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+                no_password=options.get("no_password"),
+                verbosity=options["verbosity"],
+            )
+            return
+
         username = options.get("username")
         email = options.get("email")
         password = options.get("password")
@@ -113,3 +172,116 @@ class Command(BaseCommand):
             msg += " No local password has been set (SSO-only login)."
 
         self.stdout.write(self.style.SUCCESS(msg))
+
+    def handle_file(self, path, file_format, batch_size, dry_run, no_password, verbosity):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        counts = Counter()
+        throughput = Throughput()
+        try:
+            for chunk in read_chunks(path, file_format, batch_size):
+                try:
+                    self._sync_chunk(chunk, batch_size, dry_run, no_password, verbosity, counts)
+                except Exception:
+                    # Each batch is written in its own transaction
+                    self.stderr.write(
+                        self.style.ERROR(
+                            f"Lines {chunk[0][0]}-{chunk[-1][0]} failed and were not written. "
+                            f"Before them: {self._summary(counts, dry_run)}."
+                        )
+                    )
+                    raise
+                throughput.add(len(chunk))
+        except ReadError as e:
+            raise CommandError(
+                f"Could not read {path}: {e}. Before the error: {self._summary(counts, dry_run)}."
+            ) from e
+
+        self.stdout.write(self.style.SUCCESS(f"Superadmins: {self._summary(counts, dry_run)} - {throughput}."))
+
+    def _summary(self, counts, dry_run):
+        summary = (
+            f"{counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['skipped']} skipped"
+        )
+        if dry_run:
+            summary = f"[dry run, nothing was written] {summary}"
+        return summary
+
+    def _sync_chunk(self, chunk, batch_size, dry_run, no_password, verbosity, counts):
+        desired = {}
+        for line_number, row in chunk:
+            username = row.get("username", "")
+            email = row.get("email", "")
+            if not username or not email:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"line {line_number}: username and email are required, skipping."
+                    )
+                )
+                counts["skipped"] += 1
+                continue
+            if username in desired:
+                # The last row wins, as if rows had been processed one by one.
+                counts["skipped"] += 1
+            desired[username] = (email, row.get("password", ""))
+
+        existing = User.objects.in_bulk(list(desired), field_name="username")
+
+        to_create = []
+        to_update = []
+        update_fields = set()
+        for username, (email, password) in desired.items():
+            user = existing.get(username)
+            if user is None:
+                to_create.append(
+                    User(
+                        username=username,
+                        email=email,
+                        is_staff=True,
+                        is_superuser=True,
+                        # make_password(None) returns an unusable password
+                        password=make_password(password or None),
+                    )
+                )
+                changes = [f"email={email}", "password set" if password else "SSO-only"]
+                self._diff("+", username, changes, dry_run, verbosity)
+                continue
+
+            changes = []
+            if user.email != email:
+                changes.append(f"email {user.email} -> {email}")
+                user.email = email
+                update_fields.add("email")
+            for flag in ("is_staff", "is_superuser"):
+                if not getattr(user, flag):
+                    changes.append(f"{flag} False -> True")
+                    setattr(user, flag, True)
+                    update_fields.add(flag)
+            if password:
+                changes.append("password reset")
+                user.set_password(password)
+                update_fields.add("password")
+            elif no_password and user.has_usable_password():
+                changes.append("password removed (SSO-only)")
+                user.set_unusable_password()
+                update_fields.add("password")
+
+            if changes:
+                to_update.append(user)
+                self._diff("~", username, changes, dry_run, verbosity)
+            else:
+                counts["unchanged"] += 1
+
+        if not dry_run:
+            with transaction.atomic():
+                User.objects.bulk_create(to_create, batch_size=batch_size)
+                if to_update:
+                    User.objects.bulk_update(to_update, sorted(update_fields), batch_size=batch_size)
+        counts["created"] += len(to_create)
+        counts["updated"] += len(to_update)
+
+    def _diff(self, sign, username, changes, dry_run, verbosity):
+        if dry_run or verbosity > 1:
+            self.stdout.write(f"{sign} {username}: {', '.join(changes)}")
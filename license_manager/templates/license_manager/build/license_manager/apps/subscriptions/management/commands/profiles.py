@@ -0,0 +1,92 @@
+import io
+import os
+import pstats
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ["cumulative", "tottime", "ncalls", "filename"]
+
+
+class Command(BaseCommand):
+    """
+    List, fetch and summarize the profiles stored by
+    license_manager.apps.tutor.profiling (LICENSE_MANAGER_PROFILING_ENABLED),
+    and print tokens for the X-License-Manager-Profile request header:
+
+        ./manage.py profiles token --expires-in 600
+        curl -H "X-License-Manager-Profile: <token>" https://.../api/v1/...
+        ./manage.py profiles list
+        ./manage.py profiles summary <id> --sort tottime
+        ./manage.py profiles fetch <id> --output request.prof
+    """
+
+    help = "List, fetch and summarize request and Celery task profiles."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+        list_parser = subparsers.add_parser("list", help="List the stored profiles, latest first.")
+        list_parser.add_argument("--limit", type=int, default=20)
+        summary_parser = subparsers.add_parser("summary", help="Print the functions that took the most time.")
+        summary_parser.add_argument("profile_id")
+        summary_parser.add_argument("--sort", choices=SORT_KEYS, default="cumulative")
+        summary_parser.add_argument("--limit", type=int, default=30, help="Number of functions to print.")
+        fetch_parser = subparsers.add_parser("fetch", help="Write the stats of a profile, for pstats or snakeviz.")
+        fetch_parser.add_argument("profile_id")
+        fetch_parser.add_argument("--output", help="Output file (default: <id>.prof, '-' for stdout).")
+        token_parser = subparsers.add_parser("token", help="Print a value of the X-License-Manager-Profile header.")
+        token_parser.add_argument("--expires-in", type=int, default=3600, help="Validity of the token, in seconds.")
+        subparsers.add_parser("clear", help="Delete every stored profile.")
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "TUTOR_PROFILING", None):
+            raise CommandError("Profiling is disabled: set LICENSE_MANAGER_PROFILING_ENABLED=true.")
+        from license_manager.apps.tutor import profiling  # pylint: disable=import-outside-toplevel
+
+        action = options["action"]
+        if action == "token":
+            self.stdout.write(profiling.make_token(options["expires_in"]))
+        elif action == "list":
+            self._list(profiling.storage().list()[: options["limit"]])
+        elif action == "clear":
+            profiling.storage().clear()
+            self.stdout.write(self.style.SUCCESS("Deleted every profile"))
+        else:
+            stats = profiling.storage().load(options["profile_id"])
+            if stats is None:
+                raise CommandError(f"No profile with id {options['profile_id']}")
+            if action == "fetch":
+                self._fetch(options["profile_id"], stats, options["output"])
+            else:
+                self._summary(stats, options["sort"], options["limit"])
+
+    def _list(self, profiles):
+        self.stdout.write(f"{'id':<28} {'kind':<8} {'trigger':<7} {'status':<8} {'ms':>9}  name")
+        for profile in profiles:
+            self.stdout.write(
+                f"{profile['id']:<28} {profile['kind']:<8} {profile['trigger']:<7} {str(profile['status']):<8} "
+                f"{profile['duration_ms']:>9.1f}  {profile['name']}"
+            )
+
+    def _fetch(self, profile_id, stats, output):
+        if output == "-":
+            sys.stdout.buffer.write(stats)
+            return
+        output = output or f"{profile_id}.prof"
+        with open(output, "wb") as f:
+            f.write(stats)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}: python -m pstats {output}"))
+
+    def _summary(self, stats, sort, limit):
+        # pstats only reads files
+        with tempfile.NamedTemporaryFile(suffix=".prof", delete=False) as f:
+            f.write(stats)
+        try:
+            output = io.StringIO()
+            profile_stats = pstats.Stats(f.name, stream=output)
+            profile_stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        finally:
+            os.remove(f.name)
+        self.stdout.write(output.getvalue())
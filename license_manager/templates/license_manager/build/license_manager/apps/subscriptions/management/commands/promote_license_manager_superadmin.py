@@ -1,5 +1,10 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from license_manager.apps.tutor.bulk import FORMATS, ReadError, Throughput, read_chunks
 
 User = get_user_model()
 
@@ -15,6 +20,10 @@ class Command(BaseCommand):
     Usage:
         ./manage.py promote_license_manager_superadmin --username dev
         ./manage.py promote_license_manager_superadmin --username dev --email dev@example.com
+
+        # Bulk: one username per line (or a CSV/JSONL file with a "username" field)
+        ./manage.py promote_license_manager_superadmin --from-file usernames.txt --dry-run
+        ./manage.py promote_license_manager_superadmin --from-file usernames.txt
     """
 
     help = "Promote an existing user to License Manager superadmin (is_staff + is_superuser)."
@@ -22,17 +31,54 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             "--username",
-            required=True,
-            help="Username of the user to promote.",
+            help="Username of the user to promote (required unless --from-file is used).",
         )
         parser.add_argument(
             "--email",
             help="(Optional) Email of the user to promote, for extra safety.",
         )
+        parser.add_argument(
+            "--from-file",
+            dest="from_file",
+            help="Promote all the usernames listed in a file ('-' reads standard input).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            dest="file_format",
+            help="Format of --from-file: txt (one username per line), csv or jsonl "
+                 "(default: guessed from the file extension, csv otherwise).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            dest="batch_size",
+            help="Number of usernames looked up and updated at once (default: 500).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            help="With --from-file: print the users that would be promoted.",
+        )
 
     def handle(self, *args, **options):
+        if options.get("from_file"):
+            if options.get("username") or options.get("email"):
+                raise CommandError("--from-file cannot be combined with --username or --email.")
+            self.handle_file(
+                options["from_file"],
+                file_format=options.get("file_format"),
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+            return
+
         username = options["username"]
         email = options.get("email")
+        if not username:
+            raise CommandError("--username or --from-file is required.")
 
         qs = User.objects.filter(username=username)
         if email:
@@ -55,3 +101,64 @@ class Command(BaseCommand):
                 f"User '{user.username}' promoted to License Manager superadmin."
             )
         )
+
+    def handle_file(self, path, file_format, batch_size, dry_run):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        counts = Counter()
+        throughput = Throughput()
+        try:
+            for chunk in read_chunks(path, file_format, batch_size):
+                try:
+                    self._promote_chunk(chunk, dry_run, counts)
+                except Exception:
+                    # Each batch is written in its own transaction
+                    self.stderr.write(
+                        self.style.ERROR(
+                            f"Lines {chunk[0][0]}-{chunk[-1][0]} failed and were not written. "
+                            f"Before them: {self._summary(counts, dry_run)}."
+                        )
+                    )
+                    raise
+                throughput.add(len(chunk))
+        except ReadError as e:
+            raise CommandError(
+                f"Could not read {path}: {e}. Before the error: {self._summary(counts, dry_run)}."
+            ) from e
+
+        self.stdout.write(self.style.SUCCESS(f"Superadmins: {self._summary(counts, dry_run)} - {throughput}."))
+
+    def _promote_chunk(self, chunk, dry_run, counts):
+        usernames = {row["username"] for _, row in chunk if row.get("username")}
+        # One query per batch instead of one per user
+        existing = {
+            username: is_staff and is_superuser
+            for username, is_staff, is_superuser in User.objects.filter(
+                username__in=usernames
+            ).values_list("username", "is_staff", "is_superuser")
+        }
+        for username in sorted(usernames - existing.keys()):
+            self.stderr.write(self.style.WARNING(f"No user found with username='{username}'."))
+        to_promote = sorted(username for username, is_admin in existing.items() if not is_admin)
+        if dry_run:
+            for username in to_promote:
+                self.stdout.write(f"~ {username}: is_staff, is_superuser -> True")
+        elif to_promote:
+            with transaction.atomic():
+                User.objects.filter(username__in=to_promote).update(
+                    is_staff=True, is_superuser=True
+                )
+
+        counts["promoted"] += len(to_promote)
+        counts["unchanged"] += len(existing) - len(to_promote)
+        counts["missing"] += len(usernames) - len(existing)
+
+    def _summary(self, counts, dry_run):
+        summary = (
+            f"{counts['promoted']} promoted, {counts['unchanged']} already superadmin, "
+            f"{counts['missing']} not found"
+        )
+        if dry_run:
+            summary = f"[dry run, nothing was written] {summary}"
+        return summary
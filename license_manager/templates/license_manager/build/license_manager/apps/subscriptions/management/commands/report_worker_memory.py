@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = ("gunicorn", "celery")
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def memory_usage(pid):
+    """
+    Return the memory of a process in kB, from /proc/<pid>/smaps_rollup (or
+    smaps, on kernels older than 4.14):
+
+    - rss: resident memory
+    - pss: resident memory, with shared pages divided between their processes
+    - shared: pages that are shared with other processes, e.g. the master
+    - unique: private pages (USS), i.e. what is freed when the process exits
+    """
+    totals = dict.fromkeys(FIELDS, 0)
+    try:
+        content = _read(f"/proc/{pid}/smaps_rollup")
+    except FileNotFoundError:
+        content = _read(f"/proc/{pid}/smaps")
+    for line in content.decode().splitlines():
+        name, __, value = line.partition(":")
+        if name in totals:
+            totals[name] += int(value.split()[0])
+    return {
+        "rss": totals["Rss"],
+        "pss": totals["Pss"],
+        "shared": totals["Shared_Clean"] + totals["Shared_Dirty"],
+        "unique": totals["Private_Clean"] + totals["Private_Dirty"],
+    }
+
+
+def _is_server(argv):
+    # "/openedx/venv/bin/gunicorn ...", "python .../celery ...", or a title set
+    # with setproctitle, e.g. "gunicorn: worker [...]". Shells that run one of
+    # them (bash -c "... && celery ...") do not match.
+    for arg in argv[:2]:
+        name = os.path.basename(arg.split(" ")[0]).strip("[:")
+        if name.startswith(SERVERS):
+            return True
+    return False
+
+
+def server_processes():
+    """
+    Return {pid: (parent pid, command line)} for the Gunicorn and Celery
+    processes of this container.
+    """
+    processes = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            argv = _read(f"/proc/{entry}/cmdline").decode(errors="replace").split("\0")
+            stat = _read(f"/proc/{entry}/stat").decode(errors="replace")
+        except OSError:
+            # Exited in the meantime
+            continue
+        if not _is_server(argv):
+            continue
+        # The command name (2nd field) may contain spaces: fields restart after ")"
+        parent_pid = int(stat.rsplit(")", 1)[1].split()[1])
+        processes[int(entry)] = (parent_pid, " ".join(argv).strip())
+    return processes
+
+
+class Command(BaseCommand):
+    """
+    Report how much memory the Gunicorn or Celery workers of a container share
+    with their master process, e.g. to measure LICENSE_MANAGER_GUNICORN_PRELOAD
+    and LICENSE_MANAGER_CELERY_PRELOAD.
+
+    For each process, prints the resident memory (RSS) split into pages that
+    are shared with other processes and pages that are unique to it (USS).
+    The mean USS of the workers is the memory cost of one more worker, and the
+    sum of the PSS is the real memory usage of the whole group.
+
+    Run it in the container of the service, with and without preloading:
+        tutor local exec -T license-manager ./manage.py report_worker_memory --json > before.json
+        tutor local exec -T license-manager ./manage.py report_worker_memory --baseline - < before.json
+        tutor local exec license-manager-worker ./manage.py report_worker_memory
+    """
+
+    help = "Report the shared and unique memory of the Gunicorn and Celery processes of this container."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON, e.g. to save a baseline.",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=argparse.FileType("r"),
+            help="JSON report to compare with ('-' for stdin).",
+        )
+
+    def handle(self, *args, **options):
+        processes = server_processes()
+        if not processes:
+            raise CommandError("No Gunicorn or Celery process found: run this command in their container.")
+
+        report = {"processes": []}
+        for pid, (parent_pid, command) in sorted(processes.items()):
+            try:
+                usage = memory_usage(pid)
+            except OSError:
+                continue
+            role = "worker" if parent_pid in processes else "master"
+            report["processes"].append(dict(usage, pid=pid, role=role, command=command))
+        report["summary"] = self._summary(report["processes"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'pid':>7} {'role':<7} {'rss':>9} {'pss':>9} {'shared':>9} {'unique':>9}  command")
+        for process in report["processes"]:
+            self.stdout.write(
+                f"{process['pid']:>7} {process['role']:<7} "
+                + " ".join(_mb(process[name]) for name in ["rss", "pss", "shared", "unique"])
+                + f"  {process['command'][:60]}"
+            )
+        summary = report["summary"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{summary['workers']} workers: {_mb(summary['worker_unique_mean']).strip()} unique and "
+                f"{_mb(summary['worker_shared_mean']).strip()} shared per worker (mean), "
+                f"{_mb(summary['total_pss']).strip()} in total (PSS)"
+            )
+        )
+        if options["baseline"]:
+            baseline = json.load(options["baseline"])["summary"]
+            for name, label in [
+                ("worker_unique_mean", "unique per worker"),
+                ("worker_shared_mean", "shared per worker"),
+                ("total_pss", "total"),
+            ]:
+                self.stdout.write(
+                    f"  {label:<18} {_mb(baseline[name])} -> {_mb(summary[name])} "
+                    f"({_percent_change(baseline[name], summary[name])})"
+                )
+
+    def _summary(self, processes):
+        workers = [process for process in processes if process["role"] == "worker"]
+        return {
+            "workers": len(workers),
+            "worker_unique_mean": int(statistics.fmean(w["unique"] for w in workers)) if workers else 0,
+            "worker_shared_mean": int(statistics.fmean(w["shared"] for w in workers)) if workers else 0,
+            "total_rss": sum(process["rss"] for process in processes),
+            "total_pss": sum(process["pss"] for process in processes),
+        }
+
+
+def _mb(kilobytes):
+    return f"{kilobytes / 1024:7.1f}MB"
+
+
+def _percent_change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.0f}%"
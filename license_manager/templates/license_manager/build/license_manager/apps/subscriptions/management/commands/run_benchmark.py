@@ -0,0 +1,131 @@
+import json
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from license_manager.apps.tutor.benchmark import runner
+from license_manager.apps.tutor.benchmark.lms_stub import LmsStub
+from license_manager.apps.tutor.benchmark.scenarios import SCENARIOS, Context, Skip
+
+
+class Command(BaseCommand):
+    """
+    Load-test the License Manager API with scripted scenarios and print the
+    latency percentiles and throughput of each one as JSON.
+
+    Requests are authenticated with JWTs signed with the LMS private key, for
+    learners and an administrator of --enterprise-customer-uuid. The "assign"
+    and "activation" scenarios write: they assign unassigned licenses of
+    --subscription-uuid to new example.com emails, then activate them.
+
+    By default the requests are sent over HTTP to --api-url, i.e. through
+    Gunicorn. With --in-process they go through the Django test client
+    instead, and the LMS and enterprise-catalog calls are answered by a local
+    stub: this measures License Manager alone. Requires
+    LICENSE_MANAGER_BENCHMARK_ENABLED.
+
+    Usage:
+        ./manage.py run_benchmark --enterprise-customer-uuid <uuid>
+        ./manage.py run_benchmark --in-process --scenario assign --scenario activation \\
+            --enterprise-customer-uuid <uuid> --subscription-uuid <uuid>
+    """
+
+    help = "Run API load-test scenarios and report p50/p95/p99 latency and throughput as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            dest="scenarios",
+            action="append",
+            choices=list(SCENARIOS),
+            help="Scenario to run; repeat for several (default: all).",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of requests of each scenario (default: 200).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Number of concurrent clients (default: 10).",
+        )
+        parser.add_argument(
+            "--assign-batch-size",
+            type=int,
+            default=10,
+            help="Number of emails assigned by each request of the 'assign' scenario (default: 10).",
+        )
+        parser.add_argument(
+            "--api-url",
+            help="Base URL of the API (default: LICENSE_MANAGER_API_URL).",
+        )
+        parser.add_argument(
+            "--in-process",
+            action="store_true",
+            help="Call the views in this process, with a stub of the LMS.",
+        )
+        parser.add_argument("--enterprise-customer-uuid", type=uuid.UUID)
+        parser.add_argument("--subscription-uuid", type=uuid.UUID)
+
+    def handle(self, *args, **options):
+        config = getattr(settings, "TUTOR_BENCHMARK", None)
+        if not config:
+            raise CommandError("The benchmark is not enabled (LICENSE_MANAGER_BENCHMARK_ENABLED).")
+        for option in ["iterations", "concurrency", "assign_batch_size"]:
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive integer.")
+        api_url = options["api_url"] or config["API_URL"]
+
+        report = {
+            "api_url": api_url,
+            "in_process": options["in_process"],
+            "iterations": options["iterations"],
+            "concurrency": options["concurrency"],
+            "scenarios": {},
+        }
+        with ExitStack() as stack:
+            if options["in_process"]:
+                stub = stack.enter_context(LmsStub())
+                stack.enter_context(
+                    override_settings(
+                        LMS_URL=stub.url,
+                        ENTERPRISE_CATALOG_URL=stub.url,
+                        BACKEND_SERVICE_EDX_OAUTH2_PROVIDER_URL=f"{stub.url}/oauth2",
+                        # Host of the Django test client
+                        ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ["testserver"],
+                    )
+                )
+                client = runner.InProcessClient(api_url)
+            else:
+                stub = None
+                client = runner.HttpClient(api_url)
+
+            context = Context(
+                client,
+                run_id=f"{int(time.time())}-{uuid.uuid4().hex[:6]}",
+                iterations=options["iterations"],
+                enterprise_customer_uuid=options["enterprise_customer_uuid"],
+                subscription_uuid=options["subscription_uuid"],
+                assign_batch_size=options["assign_batch_size"],
+            )
+            selected = options["scenarios"] or list(SCENARIOS)
+            for name, scenario in SCENARIOS.items():
+                if name not in selected:
+                    continue
+                try:
+                    calls = scenario(context)
+                except Skip as e:
+                    report["scenarios"][name] = {"skipped": str(e)}
+                    continue
+                report["scenarios"][name] = runner.run(calls, options["concurrency"])
+            if stub is not None:
+                report["lms_stub_requests"] = dict(stub.requests)
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,243 @@
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from license_manager.apps.tutor import state
+from license_manager.apps.tutor.bulk import Throughput
+
+User = get_user_model()
+
+LMS_DATABASE = "lms"
+# tutor_init_state rows (see license_manager.apps.tutor.state): the high-water
+# mark, "<max LMS user id> [<UTC start of the last run>]", and the end of the
+# last full sweep.
+HIGH_WATER_MARK = "sync_lms_users"
+FULL_SWEEP = "sync_lms_users_full"
+LOCK_NAME = "sync_lms_users"
+
+# Keyset pagination: each page starts after the last LMS user id of the previous
+# page, so that every query uses the primary key and memory stays bounded by
+# the batch size, however large auth_user is.
+LMS_USERS_QUERY = """
+    SELECT u.id, u.username, u.email, u.first_name, u.last_name, u.is_active,
+           u.date_joined, p.name
+    FROM auth_user u
+    LEFT JOIN auth_userprofile p ON p.user_id = u.id
+    WHERE u.id > %s {incremental}
+    ORDER BY u.id
+    LIMIT %s
+"""
+# New users, and existing users who logged in since the previous run. auth_user
+# and auth_userprofile have no modification time: other changes (email, name,
+# is_active) are picked up by full sweeps.
+INCREMENTAL_FILTER = "AND (u.id > %s OR u.last_login >= %s)"
+
+SYNCED_FIELDS = ["username", "email", "first_name", "last_name", "full_name", "is_active"]
+
+
+class Command(BaseCommand):
+    """
+    Copy the LMS user accounts (openedx.auth_user) to License Manager.
+
+    LMS users are read through the read-only "lms" database alias, in batches
+    ordered by LMS user id. Each batch is matched against License Manager users
+    by lms_user_id (then by username for users that were created without it)
+    and written with bulk_create/bulk_update in a single transaction.
+
+    A high-water mark is stored in the tutor_init_state table after every batch:
+    the next run only reads users created after it, and users who logged in to
+    the LMS since the previous run started. The LMS does not record when a user
+    account was last modified, so changes to the email, name or active status of
+    users who did not log in are only picked up by full sweeps: --full, or
+    --full-every to make a run a full sweep when the previous one is older than
+    that. Concurrent runs are prevented with a MySQL advisory lock.
+
+    Synced users never get a usable password (they log in with LMS SSO), and
+    is_staff/is_superuser are never copied from the LMS.
+
+    Usage:
+        ./manage.py sync_lms_users
+        ./manage.py sync_lms_users --full --batch-size 5000
+        ./manage.py sync_lms_users --full-every 86400
+    """
+
+    help = "Synchronize License Manager users with the LMS user accounts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the stored high-water mark and process every LMS user.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            dest="batch_size",
+            help="Number of LMS users read and written at once (default: 1000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            help="Count the users that would be created or updated without writing them.",
+        )
+        parser.add_argument(
+            "--full-every",
+            type=int,
+            default=0,
+            dest="full_every",
+            help="Process every LMS user when the previous full sweep is older than this many seconds (default: 0, never).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        if LMS_DATABASE not in connections:
+            raise CommandError(f"The '{LMS_DATABASE}' database is not configured.")
+
+        with state.lock(LOCK_NAME) as acquired:
+            if not acquired:
+                raise CommandError("Another sync_lms_users run is in progress.")
+            full = options["full"]
+            if not full and options["full_every"]:
+                _value, age = state.get(FULL_SWEEP)
+                full = age is None or age >= options["full_every"]
+            self.sync(
+                full=full,
+                batch_size=batch_size,
+                dry_run=options["dry_run"],
+                verbosity=options["verbosity"],
+            )
+
+    def sync(self, full, batch_size, dry_run, verbosity):
+        max_id, since = 0, None
+        high_water_mark, _age = state.get(HIGH_WATER_MARK)
+        if high_water_mark and not full:
+            max_id, _separator, since = high_water_mark.partition(" ")
+            max_id, since = int(max_id), since or None
+        lms_connection = connections[LMS_DATABASE]
+        with lms_connection.cursor() as cursor:
+            cursor.execute("SELECT UTC_TIMESTAMP()")
+            run_started = cursor.fetchone()[0].strftime("%Y-%m-%d %H:%M:%S")
+
+        if since:
+            self.stdout.write(f"Syncing LMS users with id > {max_id} or logged in since {since}")
+            query = LMS_USERS_QUERY.format(incremental=INCREMENTAL_FILTER)
+            last_id = 0
+        else:
+            # Full sweep, or a full sweep that was interrupted: resume after
+            # the last user that was processed.
+            self.stdout.write(f"Syncing all LMS users with id > {max_id}")
+            query = LMS_USERS_QUERY.format(incremental="")
+            last_id = max_id
+
+        counts = Counter()
+        throughput = Throughput()
+        while True:
+            params = [last_id, max_id, since, batch_size] if since else [last_id, batch_size]
+            with lms_connection.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            if not rows:
+                break
+
+            self.sync_batch(rows, dry_run, counts)
+            last_id = rows[-1][0]
+            throughput.add(len(rows))
+            if not dry_run:
+                # Every LMS user up to last_id has been processed: a run that is
+                # interrupted now resumes from here.
+                state.set(HIGH_WATER_MARK, f"{max(max_id, last_id)} {since or ''}".strip())
+            if verbosity > 1:
+                self.stdout.write(f"  up to LMS user id {last_id}: {throughput}")
+            if len(rows) < batch_size:
+                break
+
+        if not dry_run:
+            state.set(HIGH_WATER_MARK, f"{max(max_id, last_id)} {run_started}")
+            if not since:
+                state.set(FULL_SWEEP)
+
+        summary = (
+            f"{counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['conflicts']} username conflicts"
+        )
+        if dry_run:
+            summary = f"[dry run, nothing was written] {summary}"
+        self.stdout.write(self.style.SUCCESS(f"LMS users: {summary} - {throughput}."))
+
+    def sync_batch(self, rows, dry_run, counts):
+        desired = {}
+        for lms_user_id, username, email, first_name, last_name, is_active, date_joined, name in rows:
+            full_name = name or f"{first_name} {last_name}".strip()
+            desired[lms_user_id] = {
+                "username": username,
+                "email": email,
+                "first_name": first_name,
+                "last_name": last_name,
+                "full_name": full_name,
+                "is_active": bool(is_active),
+                "date_joined": _aware(date_joined),
+            }
+
+        existing = {
+            user.lms_user_id: user for user in User.objects.filter(lms_user_id__in=list(desired))
+        }
+        unmatched = {
+            values["username"]: lms_user_id
+            for lms_user_id, values in desired.items()
+            if lms_user_id not in existing
+        }
+        for user in User.objects.filter(username__in=list(unmatched)):
+            if user.lms_user_id is None:
+                existing[unmatched[user.username]] = user
+            else:
+                # The username belongs to another LMS user (e.g. renamed
+                # accounts): leave it alone rather than overwrite it.
+                desired.pop(unmatched[user.username])
+                counts["conflicts"] += 1
+
+        to_create = []
+        to_update = []
+        update_fields = set()
+        for lms_user_id, values in desired.items():
+            user = existing.get(lms_user_id)
+            if user is None:
+                to_create.append(
+                    User(lms_user_id=lms_user_id, password=make_password(None), **values)
+                )
+                continue
+            changed = [field for field in SYNCED_FIELDS if getattr(user, field) != values[field]]
+            if user.lms_user_id != lms_user_id:
+                user.lms_user_id = lms_user_id
+                changed.append("lms_user_id")
+            if not changed:
+                counts["unchanged"] += 1
+                continue
+            for field in changed:
+                if field != "lms_user_id":
+                    setattr(user, field, values[field])
+            to_update.append(user)
+            update_fields.update(changed)
+
+        if not dry_run:
+            with transaction.atomic():
+                User.objects.bulk_create(to_create)
+                if to_update:
+                    User.objects.bulk_update(to_update, sorted(update_fields))
+        counts["created"] += len(to_create)
+        counts["updated"] += len(to_update)
+
+
+def _aware(value):
+    # Raw cursors return naive UTC datetimes
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value, dt_timezone.utc)
+    return value
@@ -0,0 +1,5 @@
+"""
+Runtime helpers that the Tutor license_manager plugin adds to the License
+Manager image. This package is copied to license_manager/apps/tutor at build
+time and is only referenced from the Tutor-generated settings.
+"""
@@ -0,0 +1,37 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class TutorConfig(AppConfig):
+    """
+    Registers the Celery tasks of the Tutor plugin (see tasks.py), the Celery
+    signals of the read replica router when a replica is configured, the
+    shared OAuth2 tokens when they are enabled, the preloading of Celery
+    workers, and the profiling and query instrumentation of Celery tasks.
+    """
+
+    name = "license_manager.apps.tutor"
+    label = "license_manager_tutor"
+    verbose_name = "Tutor"
+
+    def ready(self):
+        if getattr(settings, "TUTOR_READ_REPLICA", None):
+            from .routers import connect_celery_signals  # pylint: disable=import-outside-toplevel
+
+            connect_celery_signals()
+        if getattr(settings, "TUTOR_OAUTH", None):
+            from .oauth import install  # pylint: disable=import-outside-toplevel
+
+            install()
+        if getattr(settings, "TUTOR_CELERY_PRELOAD", False):
+            from . import preload  # pylint: disable=import-outside-toplevel
+
+            preload.connect_celery_signals()
+        if getattr(settings, "TUTOR_PROFILING", None):
+            from . import profiling  # pylint: disable=import-outside-toplevel
+
+            profiling.connect_celery_signals()
+        if getattr(settings, "TUTOR_QUERIES", None):
+            from . import queries  # pylint: disable=import-outside-toplevel
+
+            queries.connect_celery_signals()
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from edx_rest_framework_extensions.auth.jwt.authentication import JwtAuthentication
+
+from . import jwt_cache
+
+
+class CachedJwtAuthentication(JwtAuthentication):
+    """
+    JwtAuthentication that caches the id of the user resolved from verified
+    claims.
+
+    Claims themselves are cached by the JWT_DECODE_HANDLER (see jwt_cache.py),
+    so a request with a recently seen token does not verify its signature, and
+    loads its user with a single primary key lookup instead of resolving and
+    updating it from the claims. The user is always loaded from the database:
+    deactivation and permission changes apply immediately. The CSRF and
+    session checks of JWT cookies still run on every request.
+    """
+
+    def authenticate_credentials(self, payload):
+        payload_digest = jwt_cache.digest(payload)
+        user_id = jwt_cache.get("user", payload_digest)
+        if user_id is not None:
+            user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+            if user is not None:
+                return user
+        user = super().authenticate_credentials(payload)
+        jwt_cache.set("user", payload_digest, user.pk, payload.get("exp"))
+        return user
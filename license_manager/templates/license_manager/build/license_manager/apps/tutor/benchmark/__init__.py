@@ -0,0 +1,9 @@
+"""
+Load-test scenarios for License Manager, run by `./manage.py run_benchmark`
+(`tutor local do benchmark`).
+
+- tokens: JWTs signed with the LMS private key, like the ones of real users;
+- lms_stub: a local HTTP server that answers the LMS calls of License Manager;
+- scenarios: the scripted API calls;
+- runner: concurrent execution and latency/throughput statistics.
+"""
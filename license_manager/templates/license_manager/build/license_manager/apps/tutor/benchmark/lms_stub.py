@@ -0,0 +1,86 @@
+import json
+import re
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENTERPRISE_CUSTOMER_PATH = re.compile(r"^/enterprise/api/v1/enterprise-customer/(?P<uuid>[0-9a-f-]+)/")
+
+
+class LmsStub:
+    """
+    Local HTTP server that stands in for the LMS (and enterprise-catalog)
+    during in-process benchmarks, so that the measured latency does not
+    depend on them.
+
+    It issues OAuth2 access tokens, describes any enterprise customer and
+    answers every other call with an empty JSON object. Requests are counted
+    by path.
+
+        with LmsStub() as stub:
+            ... settings.LMS_URL = stub.url ...
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.requests = Counter()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately: without this, keep-alive
+            # responses wait for delayed ACKs (~40ms)
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._answer()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._answer()
+
+            do_PUT = do_PATCH = do_DELETE = do_POST
+
+            def _answer(self):
+                path = self.path.split("?")[0]
+                stub.requests[path] += 1
+                body = json.dumps(stub.response(path)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def response(self, path):
+        if path.endswith("/oauth2/access_token"):
+            return {"access_token": "benchmark", "token_type": "JWT", "expires_in": 3600}
+        match = ENTERPRISE_CUSTOMER_PATH.match(path)
+        if match:
+            return {
+                "uuid": match["uuid"],
+                "name": "Benchmark enterprise",
+                "slug": "benchmark",
+                "contact_email": "benchmark@example.com",
+                "sender_alias": "Benchmark",
+                "active": True,
+            }
+        return {}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,121 @@
+import json
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import close_old_connections
+from django.test import Client
+
+
+class HttpClient:
+    """
+    Send scenario requests to a running License Manager over HTTP, with one
+    keep-alive session per thread.
+    """
+
+    def __init__(self, api_url):
+        self.api_url = api_url.rstrip("/")
+        self.local = threading.local()
+
+    def request(self, method, path, token, data=None):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        response = session.request(
+            method,
+            f"{self.api_url}/{path.lstrip('/')}",
+            json=data,
+            headers={"Authorization": f"JWT {token}"},
+            timeout=30,
+        )
+        return response.status_code
+
+
+class InProcessClient:
+    """
+    Send scenario requests through the Django test client: the requests go
+    through the middleware and the views of this process, without Gunicorn
+    or the network.
+    """
+
+    def __init__(self, api_url):
+        # Only the path of the API URL is used, e.g. /api/v2
+        self.prefix = "/" + api_url.split("://", 1)[-1].split("/", 1)[-1].strip("/")
+        self.local = threading.local()
+
+    def request(self, method, path, token, data=None):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        response = client.generic(
+            method,
+            f"{self.prefix}/{path.lstrip('/')}",
+            data="" if data is None else json.dumps(data),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {token}",
+        )
+        close_old_connections()
+        return response.status_code
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run(calls, concurrency):
+    """
+    Run the calls (functions returning an HTTP status code) with `concurrency`
+    threads and return the latency (milliseconds) and throughput statistics.
+    """
+    latencies = []
+    errors = 0
+    statuses = {}
+    lock = threading.Lock()
+
+    def timed(call):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            status = call()
+        except Exception:  # pylint: disable=broad-except
+            status = "exception"
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == "exception" or status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, calls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50": _round(percentile(latencies, 0.50)),
+            "p95": _round(percentile(latencies, 0.95)),
+            "p99": _round(percentile(latencies, 0.99)),
+            "max": _round(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
@@ -0,0 +1,148 @@
+"""
+Scripted API scenarios. Each scenario returns the list of calls to time, or
+raises Skip when the data it needs was not given.
+
+Paths are relative to the API URL (LICENSE_MANAGER_API_URL).
+"""
+from .tokens import sign_jwt
+
+LEARNERS = 50
+
+
+class Skip(Exception):
+    pass
+
+
+class Context:
+    """
+    What the scenarios share: the client, the enterprise data to run against
+    and the emails assigned by the "assign" scenario of this run.
+    """
+
+    def __init__(self, client, run_id, iterations, enterprise_customer_uuid=None,
+                 subscription_uuid=None, assign_batch_size=10):
+        self.client = client
+        self.run_id = run_id
+        self.iterations = iterations
+        self.enterprise_customer_uuid = enterprise_customer_uuid
+        self.subscription_uuid = subscription_uuid
+        self.assign_batch_size = assign_batch_size
+        self.assigned_emails = []
+
+    def learner_token(self, index):
+        return sign_jwt(
+            username=f"benchmark-learner-{index}",
+            email=f"benchmark-learner-{index}@example.com",
+            lms_user_id=900000000 + index,
+            roles=[f"enterprise_learner:{self.enterprise_customer_uuid}"],
+        )
+
+    def admin_token(self):
+        return sign_jwt(
+            username="benchmark-admin",
+            email="benchmark-admin@example.com",
+            lms_user_id=899999999,
+            roles=[
+                f"enterprise_admin:{self.enterprise_customer_uuid}",
+                f"enterprise_learner:{self.enterprise_customer_uuid}",
+            ],
+        )
+
+    def require(self, *names):
+        missing = [name for name in names if not getattr(self, name)]
+        if missing:
+            raise Skip(f"requires --{missing[0].replace('_', '-')}")
+
+
+def learner_license_lookup(context):
+    """
+    GET learner-licenses/: the license status check of the learner portal, for
+    a rotating set of learners.
+    """
+    context.require("enterprise_customer_uuid")
+    tokens = [context.learner_token(index) for index in range(LEARNERS)]
+    path = f"learner-licenses/?enterprise_customer_uuid={context.enterprise_customer_uuid}"
+    return [
+        lambda token=tokens[index % LEARNERS]: context.client.request("GET", path, token)
+        for index in range(context.iterations)
+    ]
+
+
+def subscription_listing(context):
+    """
+    GET subscriptions/: the subscription list of the admin portal.
+    """
+    context.require("enterprise_customer_uuid")
+    token = context.admin_token()
+    path = f"subscriptions/?enterprise_customer_uuid={context.enterprise_customer_uuid}"
+    return [lambda: context.client.request("GET", path, token) for __ in range(context.iterations)]
+
+
+def bulk_license_assignment(context):
+    """
+    POST subscriptions/<uuid>/licenses/assign/: each call assigns
+    assign_batch_size new emails, without notifying them. This consumes
+    unassigned licenses of the subscription.
+    """
+    context.require("enterprise_customer_uuid", "subscription_uuid")
+    token = context.admin_token()
+    path = f"subscriptions/{context.subscription_uuid}/licenses/assign/"
+
+    def assign(emails):
+        status = context.client.request(
+            "POST", path, token, {"user_emails": emails, "notify_users": False}
+        )
+        if status < 400:
+            context.assigned_emails.extend(emails)
+        return status
+
+    calls = []
+    for index in range(context.iterations):
+        emails = [
+            f"benchmark-{context.run_id}-{index}-{position}@example.com"
+            for position in range(context.assign_batch_size)
+        ]
+        calls.append(lambda emails=emails: assign(emails))
+    return calls
+
+
+def license_activation(context):
+    """
+    POST license-activation/: activate the licenses assigned by the "assign"
+    scenario of the same run, as their learners.
+    """
+    context.require("enterprise_customer_uuid", "subscription_uuid")
+    # pylint: disable=import-outside-toplevel
+    from license_manager.apps.subscriptions.models import License
+
+    emails = context.assigned_emails[:context.iterations]
+    if not emails:
+        raise Skip("requires licenses assigned by the 'assign' scenario of the same run")
+    activation_keys = dict(
+        License.objects.filter(
+            subscription_plan__uuid=context.subscription_uuid, user_email__in=emails
+        ).values_list("user_email", "activation_key")
+    )
+
+    calls = []
+    for index, email in enumerate(emails):
+        if email not in activation_keys:
+            continue
+        token = sign_jwt(
+            username=email.split("@")[0],
+            email=email,
+            lms_user_id=910000000 + index,
+            roles=[f"enterprise_learner:{context.enterprise_customer_uuid}"],
+        )
+        path = f"license-activation/?activation_key={activation_keys[email]}"
+        calls.append(lambda path=path, token=token: context.client.request("POST", path, token))
+    return calls
+
+
+# In execution order: activation uses the licenses assigned just before.
+SCENARIOS = {
+    "learner-licenses": learner_license_lookup,
+    "subscriptions": subscription_listing,
+    "assign": bulk_license_assignment,
+    "activation": license_activation,
+}
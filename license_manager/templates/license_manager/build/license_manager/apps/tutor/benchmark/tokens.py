@@ -0,0 +1,36 @@
+import time
+
+import jwt
+from django.conf import settings
+
+# Matches the "kid" of JWT_PUBLIC_SIGNING_JWK_SET in the Tutor settings
+KEY_ID = "openedx"
+
+
+def sign_jwt(username, email, lms_user_id, roles=(), administrator=False, lifetime=3600):
+    """
+    Return a JWT signed with the LMS private key (JWT_RSA_PRIVATE_KEY), as the
+    LMS would issue it to a user with the given enterprise roles, e.g.
+    ["enterprise_learner:<uuid>"].
+    """
+    jwt_auth = settings.JWT_AUTH
+    now = int(time.time())
+    payload = {
+        "iss": jwt_auth["JWT_ISSUER"],
+        "aud": jwt_auth["JWT_AUDIENCE"],
+        "iat": now,
+        "exp": now + lifetime,
+        "preferred_username": username,
+        "email": email,
+        "user_id": lms_user_id,
+        "administrator": administrator,
+        "roles": list(roles),
+        "scopes": ["user_id", "email", "profile"],
+        "version": "1.2.0",
+    }
+    return jwt.encode(
+        payload,
+        settings.TUTOR_BENCHMARK["JWT_PRIVATE_KEY"],
+        algorithm="RS512",
+        headers={"kid": KEY_ID},
+    )
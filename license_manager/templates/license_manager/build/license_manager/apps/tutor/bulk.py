@@ -0,0 +1,137 @@
+"""
+Helpers for management commands that process many rows at once: streaming
+CSV/JSONL readers, chunking and throughput reporting.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+FORMATS = ("csv", "jsonl", "txt")
+
+
+def guess_format(path):
+    """
+    Return the format of a file from its extension. Standard input ("-") and
+    unknown extensions are treated as CSV.
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    if extension == "txt":
+        return "txt"
+    return "csv"
+
+
+@contextmanager
+def _open(path):
+    if path == "-":
+        yield sys.stdin
+    else:
+        with open(path, encoding="utf-8", newline="") as input_file:
+            yield input_file
+
+
+def read_rows(path, file_format=None, txt_field="username"):
+    """
+    Yield (line_number, row) pairs from a file, one row at a time.
+
+    - csv: the first line is a header with the column names.
+    - jsonl: one JSON object per line.
+    - txt: one value per line, returned as {txt_field: value}.
+
+    Blank lines are ignored, as well as jsonl/txt lines that start with "#".
+    Values are stripped strings; missing values are empty strings.
+    """
+    file_format = file_format or guess_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format '{file_format}'.")
+
+    with _open(path) as input_file:
+        if file_format == "csv":
+            reader = csv.DictReader(input_file)
+            for row in reader:
+                yield reader.line_num, {
+                    key.strip(): (value or "").strip() for key, value in row.items() if key
+                }
+            return
+
+        for line_number, line in enumerate(input_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if file_format == "txt":
+                yield line_number, {txt_field: line}
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: invalid JSON ({e})") from e
+            if not isinstance(row, dict):
+                raise ValueError(f"line {line_number}: expected a JSON object")
+            yield line_number, {
+                key: "" if value is None else str(value).strip() for key, value in row.items()
+            }
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of at most `size` items without loading the whole iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ReadError(Exception):
+    """
+    A file could not be read or parsed.
+    """
+
+
+def read_chunks(path, file_format, size):
+    """
+    Yield lists of at most `size` (line_number, row) pairs from read_rows.
+    Errors raised while reading or parsing the file are raised as ReadError,
+    so that callers can tell them apart from the errors of the code that
+    processes each chunk.
+    """
+    rows = read_rows(path, file_format)
+    while True:
+        try:
+            chunk = list(islice(rows, size))
+        except (OSError, ValueError) as e:
+            raise ReadError(str(e)) from e
+        if not chunk:
+            return
+        yield chunk
+
+
+class Throughput:
+    """
+    Count processed rows and report the processing rate.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+
+    def add(self, count):
+        self.rows += count
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.elapsed:.2f}s ({self.rate:.1f} rows/sec)"
@@ -0,0 +1,199 @@
+"""
+Cache of verified JWT claims and of the ids of the users they resolve to
+(LICENSE_MANAGER_JWT_CACHE_*).
+
+Entries are keyed by a hash of the token (claims) or of the verified claims
+(users), prefixed with a fingerprint of the verification keys in JWT_AUTH:
+rotating the JWK set or the issuer secrets changes every key. An entry never
+outlives the `exp` claim of its token, so expired tokens are always verified
+again and rejected.
+
+Each process keeps an LRU cache in memory; with SHARED, entries are also
+stored in the Django cache (Redis) so that every worker benefits from a
+verification done by another one. When Redis cannot be reached, the cache
+falls back to the in-memory one.
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+KEY_PREFIX = "tutor:jwt"
+
+_bypass = ContextVar("jwt_cache_bypass", default=False)
+_stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded in-memory cache with per-entry expiry.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, expires_at, value):
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def _config(key):
+    return settings.TUTOR_JWT_CACHE[key]
+
+
+@lru_cache(maxsize=None)
+def _local_cache():
+    return LRUCache(_config("MAX_ENTRIES"))
+
+
+@lru_cache(maxsize=None)
+def _decode_handler():
+    return import_string(_config("DECODE_HANDLER"))
+
+
+@lru_cache(maxsize=None)
+def key_set_fingerprint():
+    """
+    Return a short hash of the keys that verify JWTs.
+    """
+    jwt_auth = settings.JWT_AUTH
+    material = json.dumps(
+        [
+            jwt_auth.get("JWT_PUBLIC_SIGNING_JWK_SET"),
+            jwt_auth.get("JWT_SECRET_KEY"),
+            [
+                (issuer.get("ISSUER"), issuer.get("AUDIENCE"), issuer.get("SECRET_KEY"))
+                for issuer in jwt_auth.get("JWT_ISSUERS") or []
+            ],
+        ],
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+
+def _key(kind, digest):
+    return f"{KEY_PREFIX}:{kind}:{key_set_fingerprint()}:{digest}"
+
+
+def get(kind, digest):
+    """
+    Return a cached value, or None. Values of the in-memory cache are shared
+    by every hit: callers get a shallow copy, so that they can modify it.
+    """
+    if _bypass.get():
+        return None
+    key = _key(kind, digest)
+    entry = _local_cache().get(key)
+    if entry is not None:
+        _stats["hits"] += 1
+        return copy.copy(entry[1])
+    if _config("SHARED"):
+        try:
+            entry = cache.get(key)
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning("Shared JWT cache unavailable: %s", e)
+            entry = None
+        if entry is not None:
+            _stats["shared_hits"] += 1
+            _local_cache().set(key, *entry)
+            return copy.copy(entry[1])
+    _stats["misses"] += 1
+    return None
+
+
+def set(kind, digest, value, exp=None):  # pylint: disable=redefined-builtin
+    """
+    Cache a value for TTL seconds, or until `exp` (a timestamp) if sooner.
+    Values are plain data (claims, user ids): the Django cache serializes
+    them itself.
+    """
+    if _bypass.get():
+        return
+    now = time.time()
+    expires_at = now + _config("TTL")
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    if expires_at - now < 1:
+        return
+    key = _key(kind, digest)
+    entry = (expires_at, copy.copy(value))
+    _local_cache().set(key, *entry)
+    if _config("SHARED"):
+        try:
+            cache.set(key, entry, timeout=int(expires_at - now))
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning("Shared JWT cache unavailable: %s", e)
+
+
+def digest(value):
+    """
+    Return the cache digest of a token (str) or of verified claims (dict).
+    """
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+@contextmanager
+def bypass():
+    """
+    Disable the cache in the enclosed block, e.g. to measure what it saves.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def stats():
+    """
+    Return the hit/miss counters of the current process.
+    """
+    return dict(_stats, entries=len(_local_cache().entries))
+
+
+def cached_jwt_decode_handler(token):
+    """
+    JWT_AUTH["JWT_DECODE_HANDLER"]: verify a token with the configured handler
+    (TUTOR_JWT_CACHE["DECODE_HANDLER"]) unless its claims are cached.
+    """
+    token_digest = digest(token)
+    payload = get("claims", token_digest)
+    if payload is None:
+        payload = _decode_handler()(token)
+        set("claims", token_digest, payload, payload.get("exp"))
+    return payload
@@ -0,0 +1,215 @@
+"""
+Structured, non-blocking logging (LICENSE_MANAGER_LOGGING_STRUCTURED).
+
+Log records are put on an in-memory queue by the request and Celery threads,
+and formatted as JSON and written by a background listener thread, so that
+slow log I/O never shows up in request latency. When the queue is full,
+records are dropped and counted rather than blocking the caller.
+
+`configure` rewrites the LOGGING dict of the settings: it is applied to the
+web and worker containers alike.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes of every LogRecord: everything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+}
+
+_handlers = weakref.WeakSet()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format a record as a single-line JSON object, including `extra` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records of noisy loggers.
+
+    `rates` maps logger names to the fraction of records to keep (0 to 1); a
+    rate applies to the logger and its children, the most specific name
+    wins. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # Most specific names first
+        self.rates = sorted((rates or {}).items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Queue records for a listener thread that writes them to a stream.
+
+    The formatter set on this handler is used by the listener thread, so JSON
+    serialization does not run on the calling thread either. After a fork
+    (Gunicorn preload, Celery prefork pool) the child starts its own queue and
+    listener thread.
+    """
+
+    def __init__(self, stream=None, queue_size=10000):
+        self.queue_size = queue_size
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        super().__init__(queue.Queue(queue_size))
+        self.listener = None
+        self._start()
+        _handlers.add(self)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def _restart_after_fork(self):
+        # The listener thread does not exist in the child, and the queue lock
+        # may have been held by it at fork time.
+        self.queue = queue.Queue(self.queue_size)
+        self.dropped = 0
+        self._start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Resolve the message arguments and the traceback now: they may change
+        # or hold frames by the time the listener formats the record.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(self._dropped_record())
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _dropped_record(self):
+        return logging.makeLogRecord(
+            {
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"{self.dropped} log records were dropped: the logging queue was full.",
+            }
+        )
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
+
+def _after_fork_in_child():
+    for handler in list(_handlers):
+        if handler.listener is not None:
+            handler._restart_after_fork()  # pylint: disable=protected-access
+
+
+def _flush_at_exit():
+    for handler in list(_handlers):
+        if handler.listener is not None:
+            handler.listener.stop()
+            handler.listener = None
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(_flush_at_exit)
+
+
+def configure(logging_config, structured=False, queue_size=10000, levels=None, sampling=None):
+    """
+    Return a copy of a LOGGING dict with:
+
+    - structured: JSON records written by a BackgroundHandler instead of the
+      "console" stream handler;
+    - levels: {logger name: level} overrides;
+    - sampling: {logger name: rate} applied to every handler.
+    """
+    # Handlers may hold stream objects, which cannot be deep-copied
+    config = dict(logging_config)
+    for section in ("formatters", "filters", "handlers", "loggers"):
+        config[section] = {
+            name: dict(value) for name, value in config.get(section, {}).items()
+        }
+    handlers = config["handlers"]
+    loggers = config["loggers"]
+
+    if structured:
+        config["formatters"]["json"] = {"()": f"{__name__}.JsonFormatter"}
+        console = handlers.get("console", {})
+        handlers["console"] = {
+            "()": f"{__name__}.BackgroundHandler",
+            "level": console.get("level", "INFO"),
+            "formatter": "json",
+            "stream": console.get("stream", "ext://sys.stderr"),
+            "queue_size": queue_size,
+        }
+        if console.get("filters"):
+            handlers["console"]["filters"] = console["filters"]
+
+    if sampling:
+        config["filters"]["sampling"] = {
+            "()": f"{__name__}.SamplingFilter",
+            "rates": sampling,
+        }
+        for handler in handlers.values():
+            handler["filters"] = list(handler.get("filters", [])) + ["sampling"]
+
+    for name, level in (levels or {}).items():
+        loggers.setdefault(name, {})["level"] = level
+    return config
@@ -0,0 +1,45 @@
+from django.http import HttpResponse
+
+HEALTH_CHECK_PATH = "/healthz"
+METRICS_PATH = "/metrics"
+
+
+class HealthCheckMiddleware:
+    """
+    Answer HEALTH_CHECK_PATH with a plain 200 response.
+
+    This middleware must come first in MIDDLEWARE: the response is returned
+    before any other middleware runs, so that Kubernetes probes never touch the
+    database or the cache, are not redirected to https and are not rejected by
+    ALLOWED_HOSTS (probes use the pod IP as Host header). A 200 response means
+    that Django finished loading and that the worker is able to serve requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == HEALTH_CHECK_PATH:
+            return HttpResponse("OK", content_type="text/plain")
+        return self.get_response(request)
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Serve the Prometheus metrics of all Gunicorn workers at METRICS_PATH.
+
+    This middleware comes right after HealthCheckMiddleware, so that scrapes
+    are not counted in the request metrics. The metrics endpoint is not exposed
+    by Caddy: it is only reachable from inside the cluster/compose network.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == METRICS_PATH:
+            # Aggregates the per-process files of PROMETHEUS_MULTIPROC_DIR when set
+            from django_prometheus.exports import ExportToDjangoView  # pylint: disable=import-outside-toplevel
+
+            return ExportToDjangoView(request)
+        return self.get_response(request)
@@ -0,0 +1,302 @@
+"""
+Shared OAuth2 client-credentials tokens and pooled HTTP connections for the
+backend-service clients (LICENSE_MANAGER_OAUTH_TOKEN_CACHE_ENABLED).
+
+edx-rest-api-client caches access tokens, but every process that misses the
+cache fetches its own token at the same time, e.g. after a restart or when a
+bulk job starts many Celery processes. Here the token is stored in the Django
+cache (Redis) and a lock makes sure that a single process fetches a new one,
+shortly before the current one expires; the other processes wait for it and
+reuse it. The lock holds a value unique to its holder, and is released with
+compare-and-delete: a holder that outlives LOCK_TIMEOUT does not release the
+lock of the next one.
+
+OAuthAPIClient instances are requests sessions, and License Manager creates a
+new one for most calls. All of them share a per-process connection pool so
+that keep-alive connections to the LMS and enterprise-catalog are reused.
+
+`install()` patches edx_rest_api_client; it is called by TutorConfig.ready().
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from edx_rest_api_client import client as edx_client
+from redis.exceptions import LockError
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+KEY_PREFIX = "tutor:oauth"
+# Longer than the token endpoint timeout: a crashed holder releases the lock
+LOCK_TIMEOUT = 15
+LOCK_POLL_INTERVAL = 0.1
+
+_stats = {"token_fetches": 0, "token_hits": 0, "lock_waits": 0}
+_local_tokens = {}
+_lock = threading.Lock()
+
+
+def _config(key):
+    return settings.TUTOR_OAUTH[key]
+
+
+class CacheLock:
+    """
+    The subset of redis.lock.Lock that is used here, for the cache backends
+    other than Redis (e.g. local memory, within a single process).
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.token = uuid.uuid4().hex
+
+    def acquire(self, blocking=False):
+        return cache.add(self.key, self.token, timeout=LOCK_TIMEOUT)
+
+    def release(self):
+        if cache.get(self.key) != self.token:
+            raise LockError("Cannot release a lock that is no longer owned")
+        cache.delete(self.key)
+
+
+def token_lock(key):
+    """
+    Return a lock that only its holder can release: a redis-py Lock, which
+    releases with a compare-and-delete Lua script, when the cache is Redis.
+    """
+    # RedisCacheClient of django.core.cache.backends.redis.RedisCache
+    redis_cache = getattr(cache, "_cache", None)
+    if not hasattr(redis_cache, "get_client"):
+        return CacheLock(key)
+    key = cache.make_and_validate_key(key)
+    return redis_cache.get_client(key, write=True).lock(key, timeout=LOCK_TIMEOUT)
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter shared by every session of the process.
+    """
+
+    def connections_opened(self):
+        pools = self.poolmanager.pools
+        total = 0
+        for pool_key in pools.keys():
+            try:
+                total += pools[pool_key].num_connections
+            except KeyError:
+                # Evicted in the meantime
+                pass
+        return total
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        response = super().send(request, **kwargs)
+        _metrics_set("connections", self.connections_opened())
+        return response
+
+
+@lru_cache(maxsize=None)
+def http_adapter(pid):
+    """
+    Return the HTTP adapter (connection pool) of a process. Forked processes
+    get their own: connections must not be shared with the parent.
+    """
+    maxsize = _config("POOL_MAXSIZE")
+    return CountingHTTPAdapter(pool_connections=maxsize, pool_maxsize=maxsize)
+
+
+def mount_pool(session):
+    adapter = http_adapter(os.getpid())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_sessions = threading.local()
+
+
+def http_session():
+    """
+    Return a requests session that uses the pooled connections.
+    """
+    session = getattr(_sessions, "session", None)
+    if session is None or getattr(_sessions, "pid", None) != os.getpid():
+        session = mount_pool(requests.Session())
+        session.headers["User-Agent"] = edx_client.USER_AGENT
+        _sessions.session = session
+        _sessions.pid = os.getpid()
+    return session
+
+
+def fetch_oauth_access_token(url, client_id, client_secret, token_type, grant_type, refresh_token, timeout):
+    """
+    Same as edx_rest_api_client.client.get_oauth_access_token, over a pooled
+    session.
+    """
+    now = datetime.datetime.utcnow()
+    data = {
+        "grant_type": grant_type,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "token_type": token_type,
+    }
+    if refresh_token:
+        data["refresh_token"] = refresh_token
+    response = http_session().post(edx_client._get_oauth_url(url), data=data, timeout=timeout)  # pylint: disable=protected-access
+    response.raise_for_status()
+    try:
+        payload = response.json()
+        access_token = payload["access_token"]
+        expires_in = payload["expires_in"]
+    except (KeyError, ValueError) as e:
+        raise requests.RequestException(response=response) from e
+
+    _stats["token_fetches"] += 1
+    _metrics_set("token_fetches", _stats["token_fetches"])
+    log.info(
+        "Fetched a new %s access token for %s (process %s: %s fetches)",
+        token_type, client_id, os.getpid(), _stats["token_fetches"],
+    )
+    return access_token, now + datetime.timedelta(seconds=expires_in)
+
+
+def _is_fresh(value):
+    if value is None:
+        return False
+    __, expiration = value
+    margin = datetime.timedelta(seconds=_config("REFRESH_MARGIN"))
+    return datetime.datetime.utcnow() < expiration - margin
+
+
+def token_cache_key(url, client_id, token_type="jwt", grant_type="client_credentials"):
+    oauth_url = edx_client._get_oauth_url(url)  # pylint: disable=protected-access
+    return f"{KEY_PREFIX}:{token_type}:{grant_type}:{client_id}:{oauth_url}"
+
+
+def _remember(key, value):
+    with _lock:
+        _local_tokens[key] = value
+
+
+def get_and_cache_oauth_access_token(
+    url,
+    client_id,
+    client_secret,
+    token_type="jwt",
+    grant_type="client_credentials",
+    refresh_token=None,
+    timeout=(edx_client.REQUEST_CONNECT_TIMEOUT, edx_client.REQUEST_READ_TIMEOUT),
+):
+    """
+    Replacement for edx_rest_api_client.client.get_and_cache_oauth_access_token
+    that fetches each token once for all processes.
+
+    Returns:
+        tuple: (access token string, expiration datetime)
+    """
+    oauth_url = edx_client._get_oauth_url(url)  # pylint: disable=protected-access
+    if refresh_token:
+        # Refresh tokens are specific to a user session: nothing to share
+        return fetch_oauth_access_token(
+            oauth_url, client_id, client_secret, token_type, grant_type, refresh_token, timeout
+        )
+
+    key = token_cache_key(oauth_url, client_id, token_type, grant_type)
+    value = _local_tokens.get(key)
+    if _is_fresh(value):
+        _stats["token_hits"] += 1
+        return value
+
+    lock = token_lock(f"{key}:lock")
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        value = cache.get(key)
+        if _is_fresh(value):
+            _stats["token_hits"] += 1
+            _remember(key, value)
+            return value
+        if lock.acquire(blocking=False):
+            break
+        if time.monotonic() >= deadline:
+            # The lock holder is too slow: do not fail the caller
+            log.warning("Timed out waiting for another process to fetch the %s access token.", client_id)
+            return fetch_oauth_access_token(
+                oauth_url, client_id, client_secret, token_type, grant_type, None, timeout
+            )
+        _stats["lock_waits"] += 1
+        time.sleep(LOCK_POLL_INTERVAL)
+
+    try:
+        value = fetch_oauth_access_token(
+            oauth_url, client_id, client_secret, token_type, grant_type, None, timeout
+        )
+        __, expiration = value
+        ttl = int((expiration - datetime.datetime.utcnow()).total_seconds())
+        if ttl > 0:
+            cache.set(key, value, timeout=ttl)
+        _remember(key, value)
+        return value
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            log.warning("The lock on the %s access token expired while it was fetched.", client_id)
+
+
+def stats():
+    """
+    Return the token and connection counters of the current process.
+    """
+    return dict(
+        _stats,
+        pid=os.getpid(),
+        connections=http_adapter(os.getpid()).connections_opened(),
+    )
+
+
+@lru_cache(maxsize=None)
+def _metrics():
+    if not _config("METRICS"):
+        return {}
+    from prometheus_client import Gauge  # pylint: disable=import-outside-toplevel
+
+    # Per-process values: "all" keeps one series per pid in multiprocess mode
+    return {
+        "token_fetches": Gauge(
+            "license_manager_oauth_token_fetches",
+            "OAuth2 access tokens fetched from the LMS by this process.",
+            multiprocess_mode="all",
+        ),
+        "connections": Gauge(
+            "license_manager_http_connections_opened",
+            "HTTP connections opened by the pooled backend-service clients of this process.",
+            multiprocess_mode="all",
+        ),
+    }
+
+
+def _metrics_set(name, value):
+    gauge = _metrics().get(name)
+    if gauge is not None:
+        gauge.set(value)
+
+
+def install():
+    """
+    Make edx_rest_api_client use the shared tokens and the pooled connections.
+    """
+    edx_client.get_and_cache_oauth_access_token = get_and_cache_oauth_access_token
+    original_init = edx_client.OAuthAPIClient.__init__
+
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        mount_pool(self)
+
+    edx_client.OAuthAPIClient.__init__ = __init__
@@ -0,0 +1,119 @@
+"""
+Preloading for forking servers (LICENSE_MANAGER_GUNICORN_PRELOAD,
+LICENSE_MANAGER_CELERY_PRELOAD).
+
+The master process imports the application and warms it up once; workers are
+forked from it and share its memory pages for as long as neither side writes
+to them. The garbage collector writes to every object that it examines, so the
+objects of the master are frozen (gc.freeze) before forking: collections in
+the workers then ignore them.
+
+Connections must not be shared between processes: the master closes its
+database and Redis connections before forking, and each worker drops the
+connection pools that it inherited.
+
+The Gunicorn hooks are in gunicorn.conf.py; the Celery signals are connected
+by TutorConfig.ready().
+"""
+import gc
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    Load what every worker would otherwise load on its first requests: the URL
+    resolvers (and so every view module), the DRF authentication, permission,
+    parser and renderer classes, and the JWT signing keys.
+    """
+    # pylint: disable=import-outside-toplevel
+    import jwt
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    started = time.perf_counter()
+    resolver = get_resolver()
+    resolver._populate()  # pylint: disable=protected-access
+    for name in [
+        "DEFAULT_AUTHENTICATION_CLASSES",
+        "DEFAULT_PERMISSION_CLASSES",
+        "DEFAULT_PARSER_CLASSES",
+        "DEFAULT_RENDERER_CLASSES",
+        "DEFAULT_PAGINATION_CLASS",
+        "DEFAULT_FILTER_BACKENDS",
+    ]:
+        getattr(api_settings, name)
+    jwk_set = settings.JWT_AUTH.get("JWT_PUBLIC_SIGNING_JWK_SET")
+    if jwk_set:
+        try:
+            # Also loads the cryptography backends
+            jwt.PyJWKSet.from_json(jwk_set)
+        except jwt.PyJWTError as e:
+            # Reported by the authentication of the first request
+            log.warning("Could not load the JWT signing keys: %s", e)
+    if getattr(settings, "TUTOR_JWT_CACHE", None):
+        from . import jwt_cache
+
+        jwt_cache.key_set_fingerprint()
+    log.info("Warmed up in %.2fs", time.perf_counter() - started)
+
+
+def close_connections():
+    """
+    Close the database connections and the Redis connection pools of the
+    cache.
+
+    In a forked process, the pools inherited from the parent are dropped
+    without closing their sockets (redis-py checks the pid of the pools), so
+    this is also safe to call in workers.
+    """
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        # django.core.cache.backends.redis.RedisCache creates its client lazily
+        client = cache.__dict__.get("_cache")
+        pools = getattr(client, "_pools", None)
+        if pools:
+            for pool in pools.values():
+                pool.disconnect()
+            pools.clear()
+        cache.close()
+
+
+def freeze():
+    """
+    Move every object of this process to the permanent generation, right
+    before forking.
+    """
+    gc.collect()
+    gc.freeze()
+    log.info("Froze %d objects before forking", gc.get_freeze_count())
+
+
+def _celery_worker_init(**kwargs):
+    warm_up()
+    close_connections()
+    freeze()
+
+
+def _celery_worker_process_init(**kwargs):
+    # Celery already closes the database connections of pool processes
+    close_connections()
+
+
+def connect_celery_signals():
+    """
+    Warm up the main process of Celery workers before the prefork pool starts.
+    Called by TutorConfig.ready().
+    """
+    from celery.signals import worker_init, worker_process_init  # pylint: disable=import-outside-toplevel
+
+    worker_init.connect(_celery_worker_init, weak=False, dispatch_uid="tutor_preload_worker_init")
+    worker_process_init.connect(
+        _celery_worker_process_init, weak=False, dispatch_uid="tutor_preload_worker_process_init"
+    )
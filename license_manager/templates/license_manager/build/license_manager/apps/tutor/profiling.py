@@ -0,0 +1,303 @@
+"""
+On-demand cProfile profiles of requests and Celery tasks
+(LICENSE_MANAGER_PROFILING_*).
+
+A request is profiled when:
+
+- it carries a valid X-License-Manager-Profile header, as printed by
+  `./manage.py profiles token`;
+- it has a `_profile` query parameter and is made by a staff user, as
+  authenticated by the session (the middleware comes after
+  AuthenticationMiddleware): API clients that authenticate with a JWT in the
+  view use the header instead;
+- or at random, for a fraction TUTOR_PROFILING["SAMPLE_RATE"] of requests.
+
+A Celery task is profiled when its name is in TUTOR_PROFILING["CELERY_TASKS"],
+when it was sent with a `tutor_profile` header, or at random.
+
+Each process profiles one request or task at a time: the others run as usual.
+Profiles are stored in TUTOR_PROFILING["DIR"] when it is set, e.g. a mounted
+volume, and in a Redis list otherwise. Only the MAX_PROFILES latest ones are
+kept. The stats use the format of cProfile.Profile.dump_stats, so that
+pstats, snakeviz and the like can read them.
+"""
+import base64
+import cProfile
+import json
+import logging
+import marshal
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+
+log = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_LICENSE_MANAGER_PROFILE"
+RESPONSE_HEADER = "X-License-Manager-Profile"
+QUERY_PARAMETER = "_profile"
+TOKEN_SALT = "license_manager.apps.tutor.profiling"
+
+# One profile at a time per process
+_lock = threading.Lock()
+# Profiles of the running tasks, by task id
+_task_profiles = {}
+
+
+def _config(key):
+    return settings.TUTOR_PROFILING[key]
+
+
+def make_token(expires_in):
+    """
+    Return a value of the profiling header that is valid for expires_in
+    seconds.
+    """
+    return signing.Signer(salt=TOKEN_SALT).sign(str(int(time.time() + expires_in)))
+
+
+def _valid_token(token):
+    try:
+        expires_at = int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return False
+    return expires_at > time.time()
+
+
+def _sampled():
+    return random.random() < _config("SAMPLE_RATE")
+
+
+class Profile:
+    """
+    A cProfile profiler that only runs when no other profile is running in
+    this process.
+    """
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.started = None
+        self.duration = None
+
+    def start(self):
+        if not _lock.acquire(blocking=False):
+            return False
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Another profiling tool is active (sys.monitoring, Python 3.12+)
+            _lock.release()
+            return False
+        self.started = time.perf_counter()
+        return True
+
+    def stop(self):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        _lock.release()
+
+    def save(self, kind, name, status):
+        """
+        Store the profile and return its id. Never raises: profiling must not
+        break the request or the task.
+        """
+        created = datetime.now(timezone.utc)
+        profile_id = f"{created:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        meta = {
+            "id": profile_id,
+            "kind": kind,
+            "name": name,
+            "status": status,
+            "trigger": self.trigger,
+            "duration_ms": round(self.duration * 1000, 1),
+            "created": created.isoformat(timespec="seconds"),
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+        }
+        try:
+            self.profiler.create_stats()
+            storage().save(meta, marshal.dumps(self.profiler.stats))
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Could not save the profile of %s", name)
+            return None
+        log.info("Profiled %s in %sms: %s", name, meta["duration_ms"], profile_id)
+        return profile_id
+
+
+class DirectoryStorage:
+    """
+    <id>.json (metadata) and <id>.prof (stats) files in a directory.
+    """
+
+    def __init__(self, path, max_profiles):
+        self.path = path
+        self.max_profiles = max_profiles
+
+    def save(self, meta, stats):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, f"{meta['id']}.prof"), "wb") as f:
+            f.write(stats)
+        with open(os.path.join(self.path, f"{meta['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        for profile_id in self._ids()[self.max_profiles:]:
+            self.delete(profile_id)
+
+    def _ids(self):
+        if not os.path.isdir(self.path):
+            return []
+        # Ids start with their UTC creation time: latest first
+        return sorted((name[:-5] for name in os.listdir(self.path) if name.endswith(".json")), reverse=True)
+
+    def list(self):
+        profiles = []
+        for profile_id in self._ids():
+            try:
+                with open(os.path.join(self.path, f"{profile_id}.json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def load(self, profile_id):
+        try:
+            with open(os.path.join(self.path, f"{os.path.basename(profile_id)}.prof"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, profile_id):
+        for extension in ["json", "prof"]:
+            try:
+                os.remove(os.path.join(self.path, f"{profile_id}.{extension}"))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for profile_id in self._ids():
+            self.delete(profile_id)
+
+
+class RedisStorage:
+    """
+    A Redis list of JSON documents, latest first.
+    """
+
+    def __init__(self, url, key, max_profiles):
+        import redis  # pylint: disable=import-outside-toplevel
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+        self.max_profiles = max_profiles
+
+    def save(self, meta, stats):
+        document = dict(meta, stats=base64.b64encode(stats).decode())
+        with self.client.pipeline() as pipeline:
+            pipeline.lpush(self.key, json.dumps(document))
+            pipeline.ltrim(self.key, 0, self.max_profiles - 1)
+            pipeline.execute()
+
+    def _documents(self):
+        for value in self.client.lrange(self.key, 0, -1):
+            yield json.loads(value)
+
+    def list(self):
+        return [{k: v for k, v in document.items() if k != "stats"} for document in self._documents()]
+
+    def load(self, profile_id):
+        for document in self._documents():
+            if document["id"] == profile_id:
+                return base64.b64decode(document["stats"])
+        return None
+
+    def clear(self):
+        self.client.delete(self.key)
+
+
+_storage = []
+
+
+def storage():
+    if not _storage:
+        if _config("DIR"):
+            _storage.append(DirectoryStorage(_config("DIR"), _config("MAX_PROFILES")))
+        else:
+            _storage.append(RedisStorage(_config("REDIS_URL"), _config("REDIS_KEY"), _config("MAX_PROFILES")))
+    return _storage[0]
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests that ask for it, and a random sample of the others.
+    The id of the stored profile is returned in the X-License-Manager-Profile
+    response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profile = Profile(trigger)
+        if not profile.start():
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        profile_id = profile.save("request", f"{request.method} {request.path}", response.status_code)
+        if profile_id:
+            response[RESPONSE_HEADER] = profile_id
+        return response
+
+    def _trigger(self, request):
+        token = request.META.get(HEADER)
+        if token and _valid_token(token):
+            return "header"
+        if QUERY_PARAMETER in request.GET and getattr(getattr(request, "user", None), "is_staff", False):
+            return "query"
+        if _sampled():
+            return "sample"
+        return None
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    if task is None:
+        return
+    if task.name in _config("CELERY_TASKS") or getattr(task.request, "tutor_profile", False):
+        trigger = "task"
+    elif _sampled():
+        trigger = "sample"
+    else:
+        return
+    profile = Profile(trigger)
+    if profile.start():
+        _task_profiles[task_id] = profile
+
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    profile = _task_profiles.pop(task_id, None)
+    if profile is None:
+        return
+    profile.stop()
+    profile.save("task", task.name, state)
+
+
+def connect_celery_signals():
+    """
+    Profile the Celery tasks listed in TUTOR_PROFILING["CELERY_TASKS"], those
+    sent with the `tutor_profile` header, and a random sample of the others.
+    Called by TutorConfig.ready().
+    """
+    from celery.signals import task_postrun, task_prerun  # pylint: disable=import-outside-toplevel
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="tutor_profiling_prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="tutor_profiling_postrun")
@@ -0,0 +1,206 @@
+"""
+SQL query counts, database time and query budgets per request and per Celery
+task (LICENSE_MANAGER_QUERY_INSTRUMENTATION).
+
+A `connection.execute_wrapper` is installed on every database alias for the
+duration of each request (QueryInstrumentationMiddleware) and of each Celery
+task (task_prerun/task_postrun signals). It counts the queries and their time,
+and logs the queries slower than TUTOR_QUERIES["SLOW_QUERY_MS"] with their
+normalized SQL.
+
+Responses carry a Server-Timing header with the database time and the
+number of queries. A request or a task that runs more queries than its budget
+logs a warning with the most repeated statements, which usually point at an
+N+1 query. Budgets are looked up by URL name (e.g. "api:v1:learner-licenses-list"),
+then by URL route (e.g. "api/v1/subscriptions/"), and by Celery task name,
+and default to TUTOR_QUERIES["DEFAULT_BUDGET"] (0 => no budget).
+
+See testing.py to enforce the same budgets in tests.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+_current = ContextVar("query_stats", default=None)
+# Instrumentation of the running tasks, by task id
+_task_stacks = {}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def _config(key):
+    return settings.TUTOR_QUERIES[key]
+
+
+def normalize_sql(sql):
+    """
+    Replace literals and placeholders with "?" and IN lists with "(...)", so
+    that the same statement with different parameters looks the same.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """
+    Queries run by a request, a task or a block of code.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def most_repeated(self, limit=3):
+        """
+        Return [(count, normalized sql)] of the most repeated statements.
+        """
+        normalized = Counter()
+        for sql, count in self.statements.items():
+            normalized[normalize_sql(sql)] += count
+        return [(count, sql) for sql, count in normalized.most_common(limit)]
+
+    def __repr__(self):
+        return f"<QueryStats {self.label}: {self.count} queries in {self.duration * 1000:.1f}ms>"
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stats.count += 1
+        stats.duration += duration
+        stats.statements[sql] += 1
+        slow_query_ms = _config("SLOW_QUERY_MS")
+        if slow_query_ms and duration * 1000 >= slow_query_ms:
+            log.warning(
+                "Slow query (%.1fms) in %s on %s: %s",
+                duration * 1000,
+                stats.label,
+                context["connection"].alias,
+                normalize_sql(sql),
+            )
+
+
+@contextmanager
+def collect(label):
+    """
+    Count the queries of the enclosed block, on every database alias of the
+    current thread, and yield their QueryStats.
+    """
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_execute_wrapper))
+            yield stats
+    finally:
+        _current.reset(token)
+
+
+def budget_for(*names):
+    """
+    Return the query budget of the first of the given names (URL name, route,
+    task name) that has one, or the default budget.
+    """
+    budgets = _config("BUDGETS")
+    for name in names:
+        if name and name in budgets:
+            return budgets[name]
+    return _config("DEFAULT_BUDGET")
+
+
+def check_budget(stats, budget):
+    """
+    Log a warning and return False when the stats exceed the budget.
+    """
+    if not budget or stats.count <= budget:
+        return True
+    log.warning(
+        "%s ran %d queries (budget: %d) in %.1fms, most repeated: %s",
+        stats.label,
+        stats.count,
+        budget,
+        stats.duration * 1000,
+        "; ".join(f"{count} x {sql}" for count, sql in stats.most_repeated()),
+    )
+    return False
+
+
+def server_timing(stats):
+    return f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count the queries of each request, add a Server-Timing header to the
+    response and warn when the request exceeds the budget of its endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect(f"{request.method} {request.path}") as stats:
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            check_budget(stats, budget_for(match.view_name, match.route))
+        else:
+            check_budget(stats, budget_for())
+        if _config("SERVER_TIMING"):
+            timing = server_timing(stats)
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+        log.debug("%r", stats)
+        return response
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    if task is None:
+        return
+    stack = ExitStack()
+    stats = stack.enter_context(collect(task.name))
+    _task_stacks[task_id] = (stats, stack)
+
+
+def _task_postrun(task_id=None, task=None, **kwargs):
+    stats, stack = _task_stacks.pop(task_id, (None, None))
+    if stack is None:
+        return
+    stack.close()
+    check_budget(stats, budget_for(task.name))
+    log.debug("%r", stats)
+
+
+def connect_celery_signals():
+    """
+    Count the queries of each Celery task, and warn when a task exceeds its
+    budget. Called by TutorConfig.ready().
+    """
+    from celery.signals import task_postrun, task_prerun  # pylint: disable=import-outside-toplevel
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="tutor_queries_prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="tutor_queries_postrun")
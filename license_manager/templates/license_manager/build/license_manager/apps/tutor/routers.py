@@ -0,0 +1,238 @@
+"""
+Send safe read-only queries to the read replica (LICENSE_MANAGER_MYSQL_REPLICA_*).
+
+Reads only go to the replica inside an explicit replica context:
+
+- requests handled by ReadReplicaMiddleware: GET/HEAD/OPTIONS requests to
+  the configured path prefixes, unless the client recently wrote something;
+- the Celery tasks listed in TUTOR_READ_REPLICA["CELERY_TASKS"];
+- code wrapped in `with replica_reads():`.
+
+Everything else, and every read that follows a write or runs inside a
+transaction, goes to the primary. The replica is also skipped while its
+replication lag exceeds TUTOR_READ_REPLICA["MAX_LAG"] or when it cannot be
+reached. Measuring the lag requires the REPLICATION CLIENT privilege: when the
+replica user does not have it, the replica is used without checking its lag.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+log = logging.getLogger(__name__)
+
+REPLICA_ALIAS = "read_replica"
+PIN_COOKIE_NAME = "license_manager_primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Sessions and SSO state are read right after they are written by another
+# request: never read them from the replica.
+PRIMARY_APP_LABELS = {"sessions", "social_django"}
+# Statements that write to the primary. Django also asks the router for the
+# write alias before reads, e.g. the lookup of get_or_create: only the
+# statements that actually run count.
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME")
+# ER_SPECIFIC_ACCESS_DENIED_ERROR: "you need (at least one of) the SUPER,
+# REPLICATION CLIENT privilege(s) for this operation"
+ACCESS_DENIED_ERROR = 1227
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_wrote = ContextVar("wrote", default=False)
+
+# (checked at, healthy), per process
+_replica_health = [0.0, False]
+# Replica contexts of the running Celery tasks, by task id
+_task_contexts = {}
+
+
+def _config(key):
+    return settings.TUTOR_READ_REPLICA[key]
+
+
+def _flag_writes(execute, sql, params, many, context):
+    """
+    Execute wrapper of the primary connection: read-after-write, the rest of
+    the replica context reads from the primary once a statement wrote to it.
+    """
+    if not _wrote.get() and sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+        _wrote.set(True)
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Route the reads of the enclosed block to the replica (or to the primary
+    with enabled=False). Writes made inside the block send the reads that
+    follow them back to the primary.
+    """
+    replica_token = _replica_reads.set(enabled)
+    wrote_token = _wrote.set(False)
+    try:
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(_flag_writes):
+            yield
+    finally:
+        _replica_reads.reset(replica_token)
+        _wrote.reset(wrote_token)
+
+
+def wrote_to_primary():
+    """
+    Return True if the current replica context wrote to the primary.
+    """
+    return _wrote.get()
+
+
+def _access_denied(error):
+    return bool(error.args) and error.args[0] == ACCESS_DENIED_ERROR
+
+
+def replication_lag():
+    """
+    Return the replication lag of the replica in seconds, 0 when the replica
+    database is not a replication target (e.g. Aurora reader endpoints), or
+    None when replication is stopped or broken.
+    """
+    with connections[REPLICA_ALIAS].cursor() as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except DatabaseError as e:
+            if _access_denied(e):
+                raise
+            # MySQL < 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        columns = [column[0] for column in cursor.description]
+    status = dict(zip(columns, row))
+    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return None if lag is None else int(lag)
+
+
+def replica_is_healthy():
+    """
+    Return True when the replication lag is within MAX_LAG. The result is
+    cached for LAG_CHECK_INTERVAL seconds in each process; a MAX_LAG of 0
+    disables the check.
+    """
+    max_lag = _config("MAX_LAG")
+    if not max_lag:
+        return True
+    checked_at, healthy = _replica_health
+    now = time.monotonic()
+    if now - checked_at < _config("LAG_CHECK_INTERVAL"):
+        return healthy
+
+    try:
+        lag = replication_lag()
+    except DatabaseError as e:
+        if _access_denied(e):
+            log.warning(
+                "Cannot measure the lag of the read replica, reading from it without checking: "
+                "grant REPLICATION CLIENT to %s. %s",
+                connections[REPLICA_ALIAS].settings_dict["USER"],
+                e,
+            )
+            # Never check again in this process
+            _replica_health[:] = [float("inf"), True]
+            return True
+        log.warning("Read replica unavailable, reading from the primary: %s", e)
+        lag = None
+    healthy = lag is not None and lag <= max_lag
+    if not healthy and lag is not None:
+        log.warning("Read replica is %ss behind, reading from the primary.", lag)
+    _replica_health[:] = [now, healthy]
+    return healthy
+
+
+class ReadReplicaRouter:
+    """
+    Database router for the "read_replica" alias. See the module docstring.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _wrote.get():
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APP_LABELS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its writes
+            return DEFAULT_DB_ALIAS
+        if not replica_is_healthy():
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class ReadReplicaMiddleware:
+    """
+    Read from the replica during safe requests to the TUTOR_READ_REPLICA["PATHS"]
+    prefixes.
+
+    When a request writes to the database, a short-lived cookie pins the
+    following requests of the same client to the primary for PIN_SECONDS, so
+    that clients read their own writes while the replica catches up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        enabled = (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE_NAME not in request.COOKIES
+            and request.path.startswith(tuple(_config("PATHS")))
+        )
+        with replica_reads(enabled):
+            response = self.get_response(request)
+            wrote = wrote_to_primary()
+        if wrote and _config("PIN_SECONDS"):
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                "1",
+                max_age=_config("PIN_SECONDS"),
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def _task_prerun(task_id=None, sender=None, **kwargs):
+    if sender is not None and sender.name in _config("CELERY_TASKS"):
+        context = replica_reads()
+        context.__enter__()  # pylint: disable=unnecessary-dunder-call
+        _task_contexts[task_id] = context
+
+
+def _task_postrun(task_id=None, sender=None, **kwargs):
+    context = _task_contexts.pop(task_id, None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
+
+def connect_celery_signals():
+    """
+    Run the Celery tasks listed in TUTOR_READ_REPLICA["CELERY_TASKS"] in a
+    replica context. Called by TutorConfig.ready().
+    """
+    from celery.signals import task_postrun, task_prerun  # pylint: disable=import-outside-toplevel
+
+    task_prerun.connect(_task_prerun, weak=False, dispatch_uid="tutor_read_replica_prerun")
+    task_postrun.connect(_task_postrun, weak=False, dispatch_uid="tutor_read_replica_postrun")
@@ -0,0 +1,62 @@
+"""
+Durable state and cross-process locks in the License Manager MySQL database,
+for the commands that must not depend on the cache (which may be local memory,
+or a Redis instance that evicts keys).
+
+State is stored in the tutor_init_state table, that the init tasks also use:
+one row per name, with a value of up to 64 characters and the time it was last
+written.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS tutor_init_state ("
+    " name VARCHAR(64) NOT NULL PRIMARY KEY,"
+    " fingerprint CHAR(64) NOT NULL DEFAULT '',"
+    " updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP)"
+)
+
+
+def get(name, using=DEFAULT_DB_ALIAS):
+    """
+    Return (value, seconds since it was written), or (None, None).
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        cursor.execute(
+            "SELECT fingerprint, TIMESTAMPDIFF(SECOND, updated_at, CURRENT_TIMESTAMP)"
+            " FROM tutor_init_state WHERE name = %s",
+            [name],
+        )
+        row = cursor.fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def set(name, value="", using=DEFAULT_DB_ALIAS):  # pylint: disable=redefined-builtin
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        cursor.execute("REPLACE INTO tutor_init_state (name, fingerprint) VALUES (%s, %s)", [name, value])
+
+
+@contextmanager
+def lock(name, using=DEFAULT_DB_ALIAS):
+    """
+    Hold a MySQL advisory lock (GET_LOCK) for the enclosed block, and yield
+    whether it was acquired: False when another process holds it. The lock
+    belongs to the database connection, so MySQL releases it when a process
+    dies without releasing it.
+    """
+    connection = connections[using]
+    # Lock names are global to the MySQL server
+    lock_name = f"{connection.settings_dict['NAME']}.{name}"[:64]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", [lock_name])
+        acquired = cursor.fetchone()[0] == 1
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", [lock_name])
@@ -0,0 +1,12 @@
+from celery import shared_task
+from django.core.management import call_command
+
+
+@shared_task(name="license_manager.apps.tutor.tasks.sync_lms_users")
+def sync_lms_users(full=False, batch_size=1000, full_every=0):
+    """
+    Periodic counterpart of `./manage.py sync_lms_users`, scheduled by
+    LICENSE_MANAGER_LMS_USER_SYNC_INTERVAL, with a full sweep every
+    LICENSE_MANAGER_LMS_USER_SYNC_FULL_INTERVAL.
+    """
+    call_command("sync_lms_users", full=full, batch_size=batch_size, full_every=full_every)
@@ -0,0 +1,75 @@
+"""
+Test helpers to enforce query budgets (see queries.py) against the test
+database, e.g. SQLite or a local MySQL:
+
+    from license_manager.apps.tutor.testing import assert_max_queries, assert_within_budget
+
+    def test_learner_licenses(self):
+        with assert_within_budget("api:v1:learner-licenses-list"):
+            self.client.get("/api/v1/learner-licenses/")
+
+    def test_subscriptions(self):
+        with assert_max_queries(10) as stats:
+            self.client.get("/api/v1/subscriptions/", {"enterprise_customer_uuid": self.enterprise_uuid})
+        print(stats.most_repeated())
+
+They raise AssertionError with the most repeated statements when the block
+runs too many queries, and do not need LICENSE_MANAGER_QUERY_INSTRUMENTATION.
+Outside of the Tutor settings, pass the budget explicitly:
+`assert_within_budget("api:v1:learner-licenses-list", budget=8)`.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+from . import queries
+
+DEFAULTS = {"SLOW_QUERY_MS": 0, "BUDGETS": {}, "DEFAULT_BUDGET": 0, "SERVER_TIMING": True}
+
+
+@contextmanager
+def _instrumentation_settings():
+    if getattr(settings, "TUTOR_QUERIES", None):
+        yield
+        return
+    with override_settings(TUTOR_QUERIES=DEFAULTS):
+        yield
+
+
+@contextmanager
+def capture_queries(label="block"):
+    """
+    Yield the QueryStats of the enclosed block.
+    """
+    with _instrumentation_settings():
+        with queries.collect(label) as stats:
+            yield stats
+
+
+@contextmanager
+def assert_max_queries(limit, label="block"):
+    """
+    Fail when the enclosed block runs more than `limit` queries.
+    """
+    with capture_queries(label) as stats:
+        yield stats
+    if stats.count > limit:
+        repeated = "\n".join(f"  {count} x {sql}" for count, sql in stats.most_repeated(5))
+        raise AssertionError(f"{label} ran {stats.count} queries, more than {limit}. Most repeated:\n{repeated}")
+
+
+@contextmanager
+def assert_within_budget(name, budget=None):
+    """
+    Fail when the enclosed block exceeds the budget of a URL name, URL route or
+    Celery task name: `budget`, or else its budget in TUTOR_QUERIES (the Tutor
+    settings, from LICENSE_MANAGER_QUERY_BUDGETS).
+    """
+    if budget is None:
+        with _instrumentation_settings():
+            budget = queries.budget_for(name)
+    if not budget:
+        raise AssertionError(f"No query budget for {name}")
+    with assert_max_queries(budget, label=name) as stats:
+        yield stats
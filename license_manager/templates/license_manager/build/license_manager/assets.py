@@ -1,4 +1,16 @@
-from .base import *
+# Settings used by `collectstatic` while building the image (see Dockerfile).
+# The Tutor-generated settings are not available at build time, so we start from
+# the repository's production settings and only override what is needed to
+# produce hashed, precompressed assets. STATIC_ROOT must match the value in the
+# Tutor production settings so that the manifest resolves at runtime.
+from .production import *
+
+STATIC_ROOT = "/openedx/staticfiles"
+
+STORAGES = dict(globals().get("STORAGES", {}))
+STORAGES["staticfiles"] = {
+    "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+}
 
 COMPRESS_ENABLED = True
 COMPRESS_OFFLINE = True
@@ -0,0 +1,68 @@
+#!/bin/sh
+#------------------------------------------------------------------------------
+# usage:      audit the shared libraries that python and the virtualenv link
+#             against, so that the runtime image only installs those.
+#
+#               runtime-libs.sh packages DIR...
+#                   print the Debian packages that provide the libraries
+#                   linked by the extension modules and executables in DIR
+#               runtime-libs.sh check DIR...
+#                   fail if one of these libraries cannot be found
+#
+#             Libraries that are bundled in DIR (e.g. the ".libs" folder of
+#             manylinux wheels) are not listed. Libraries that are opened with
+#             ctypes/dlopen are invisible to ldd: add their packages to
+#             LICENSE_MANAGER_RUNTIME_PACKAGES.
+#------------------------------------------------------------------------------
+set -e
+
+MODE=$1
+shift
+
+# ldd output of every ELF file of the given directories
+linked_libraries() {
+    find "$@" -type f \( -name "*.so" -o -name "*.so.*" -o -path "*/bin/*" \) -print0 \
+        | xargs -0 -r ldd 2>/dev/null || true
+}
+
+is_bundled() {
+    for dir in "$@"; do
+        case "$LIB" in
+            "$dir"/*) return 0 ;;
+        esac
+    done
+    return 1
+}
+
+case "$MODE" in
+    packages)
+        for LIB in $(linked_libraries "$@" | awk '$2 == "=>" && $3 ~ /^\// { print $3 }' | sort -u); do
+            if is_bundled "$@"; then
+                continue
+            fi
+            # dpkg knows the path it installed, which may differ from the
+            # resolved one when /lib is a symlink to /usr/lib
+            PACKAGE=""
+            for CANDIDATE in "$LIB" "$(readlink -f "$LIB")" "${LIB#/usr}" "/usr$LIB"; do
+                PACKAGE=$(dpkg -S "$CANDIDATE" 2>/dev/null | head -n 1 | cut -d: -f1) && [ -n "$PACKAGE" ] && break
+            done
+            if [ -z "$PACKAGE" ]; then
+                echo "runtime-libs: no package provides $LIB" >&2
+                continue
+            fi
+            echo "$PACKAGE"
+        done | sort -u
+        ;;
+    check)
+        MISSING=$(linked_libraries "$@" | awk '$2 == "=>" && $3 == "not" { print $1 }' | sort -u)
+        if [ -n "$MISSING" ]; then
+            echo "runtime-libs: missing shared libraries:" $MISSING >&2
+            exit 1
+        fi
+        echo "runtime-libs: all shared libraries found"
+        ;;
+    *)
+        echo "usage: runtime-libs.sh packages|check DIR..." >&2
+        exit 2
+        ;;
+esac
@@ -0,0 +1,58 @@
+"""
+The runtime helpers that the plugin adds to the License Manager image live in
+license_manager/templates/license_manager/build/license_manager/apps/tutor.
+They are copied to license_manager/apps/tutor at build time, which is not
+importable here (license_manager is the plugin package): load_runtime_module
+imports them from their files.
+
+Tests that need Django are skipped when it is not installed: the plugin itself
+does not depend on it.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RUNTIME_ROOT = REPO_ROOT / "license_manager" / "templates" / "license_manager" / "build" / "license_manager" / "apps" / "tutor"
+# Modules are registered under this package name, e.g. for DATABASE_ROUTERS
+RUNTIME_PACKAGE = "tutor_runtime"
+
+
+def load_runtime_module(name):
+    module_name = f"{RUNTIME_PACKAGE}.{name}"
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, RUNTIME_ROOT / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+
+def pytest_configure(config):
+    try:
+        import django  # pylint: disable=import-outside-toplevel
+        from django.conf import settings  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return
+    # Two SQLite databases stand in for the MySQL primary and read replica
+    settings.configure(
+        SECRET_KEY="tests",
+        INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth", "django.contrib.sessions"],
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            "read_replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        },
+        DATABASE_ROUTERS=[f"{RUNTIME_PACKAGE}.routers.ReadReplicaRouter"],
+        TUTOR_READ_REPLICA={
+            "MAX_LAG": 0,
+            "LAG_CHECK_INTERVAL": 10,
+            "PIN_SECONDS": 10,
+            "PATHS": ["/api/"],
+            "CELERY_TASKS": [],
+        },
+        USE_TZ=True,
+    )
+    django.setup()
+    load_runtime_module("routers")
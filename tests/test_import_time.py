@@ -0,0 +1,44 @@
+"""
+Every `tutor` command imports the plugin: keep its import time low. Same
+measure as tutor-import-time.sh, with the same LIMIT_MS environment variable.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("tutor")
+
+RUNS = 5
+LIMIT_MS = float(os.environ.get("LIMIT_MS", 20))
+# The modules that tutor imports before loading its plugins are imported
+# first, so only the cost of the plugin is counted
+IMPORT = "import tutor.commands.cli; import license_manager.plugin"
+
+
+def import_time_ms():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    # "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "license_manager.plugin":
+            return int(fields[1]) / 1000
+    raise AssertionError(f"license_manager.plugin is missing from the import times:\n{result.stderr}")
+
+
+def test_plugin_import_time():
+    # The first import writes the bytecode of the plugin, like `pip install`
+    # does: it is not counted
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    subprocess.run([sys.executable, "-c", "import license_manager.plugin"], check=True, env=env)
+    times = [import_time_ms() for _ in range(RUNS)]
+    assert statistics.median(times) <= LIMIT_MS, (
+        f"license_manager.plugin takes more than {LIMIT_MS}ms to import: {times}"
+    )
@@ -0,0 +1,75 @@
+"""
+Request triggers of the profiling middleware
+(license_manager/apps/tutor/profiling.py).
+"""
+import pytest
+
+pytest.importorskip("django")
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from conftest import load_runtime_module
+
+profiling = load_runtime_module("profiling")
+
+
+@pytest.fixture(autouse=True)
+def profiles_dir(tmp_path):
+    profiling._storage.clear()  # pylint: disable=protected-access
+    with override_settings(
+        TUTOR_PROFILING={
+            "SAMPLE_RATE": 0,
+            "CELERY_TASKS": [],
+            "MAX_PROFILES": 10,
+            "DIR": str(tmp_path),
+            "REDIS_URL": "",
+            "REDIS_KEY": "",
+        }
+    ):
+        yield
+    profiling._storage.clear()  # pylint: disable=protected-access
+
+
+def profile(request):
+    """
+    Return the id of the profile of the request, if any.
+    """
+    response = profiling.ProfilingMiddleware(lambda request: HttpResponse())(request)
+    return response.get(profiling.RESPONSE_HEADER)
+
+
+def get(path, user=None, **headers):
+    request = RequestFactory().get(path, **headers)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def test_requests_are_not_profiled_by_default():
+    assert profile(get("/api/v1/subscriptions/")) is None
+
+
+def test_anonymous_requests_cannot_ask_for_a_profile(monkeypatch):
+    monkeypatch.setattr(profiling.Profile, "start", lambda self: pytest.fail("profiler started"))
+    assert profile(get("/api/v1/subscriptions/?_profile")) is None
+
+
+def test_non_staff_users_cannot_ask_for_a_profile(monkeypatch):
+    monkeypatch.setattr(profiling.Profile, "start", lambda self: pytest.fail("profiler started"))
+    assert profile(get("/api/v1/subscriptions/?_profile", user=User(username="learner"))) is None
+
+
+def test_staff_users_can_ask_for_a_profile():
+    profile_id = profile(get("/api/v1/subscriptions/?_profile", user=User(username="staff", is_staff=True)))
+    assert profile_id
+    assert profiling.storage().list()[0]["trigger"] == "query"
+
+
+def test_a_signed_header_asks_for_a_profile():
+    token = profiling.make_token(60)
+    assert profile(get("/api/v1/subscriptions/", HTTP_X_LICENSE_MANAGER_PROFILE=token))
+    assert profile(get("/api/v1/subscriptions/", HTTP_X_LICENSE_MANAGER_PROFILE=f"{token}x")) is None
+    assert profile(get("/api/v1/subscriptions/", HTTP_X_LICENSE_MANAGER_PROFILE=profiling.make_token(-1))) is None
@@ -0,0 +1,275 @@
+"""
+Read replica routing (license_manager/apps/tutor/routers.py), with two SQLite
+databases standing in for the MySQL primary and replica.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("django")
+
+# pylint: disable=wrong-import-position
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from conftest import load_runtime_module
+
+routers = load_runtime_module("routers")
+
+REPLICA = routers.REPLICA_ALIAS
+PRIMARY = DEFAULT_DB_ALIAS
+
+
+@pytest.fixture(scope="module", autouse=True)
+def databases():
+    call_command("migrate", verbosity=0, database=PRIMARY)
+    # The router never migrates the replica: give it the same tables
+    with connections[REPLICA].schema_editor() as editor:
+        for model in [ContentType, Permission, Group, User]:
+            editor.create_model(model)
+    User.objects.using(PRIMARY).create(username="on-primary")
+    User.objects.using(REPLICA).create(username="on-replica")
+
+
+@pytest.fixture(autouse=True)
+def reset_router_state():
+    routers._replica_reads.set(False)  # pylint: disable=protected-access
+    routers._wrote.set(False)  # pylint: disable=protected-access
+    routers._replica_health[:] = [0.0, False]  # pylint: disable=protected-access
+    yield
+    User.objects.using(PRIMARY).exclude(username="on-primary").delete()
+
+
+def replica_settings(**overrides):
+    return override_settings(TUTOR_READ_REPLICA=dict(settings.TUTOR_READ_REPLICA, **overrides))
+
+
+def read_from():
+    """
+    Return the alias that answered a read of the users.
+    """
+    usernames = set(User.objects.values_list("username", flat=True))
+    return REPLICA if "on-replica" in usernames else PRIMARY
+
+
+def test_reads_use_the_primary_by_default():
+    assert router.db_for_read(User) == PRIMARY
+    assert read_from() == PRIMARY
+
+
+def test_reads_use_the_replica_in_a_replica_context():
+    with routers.replica_reads():
+        assert router.db_for_read(User) == REPLICA
+        assert read_from() == REPLICA
+    assert read_from() == PRIMARY
+
+
+def test_replica_reads_can_be_disabled():
+    with routers.replica_reads(enabled=False):
+        assert read_from() == PRIMARY
+
+
+def test_writes_always_use_the_primary():
+    with routers.replica_reads():
+        assert router.db_for_write(User) == PRIMARY
+
+
+def test_reads_after_a_write_use_the_primary():
+    with routers.replica_reads():
+        assert read_from() == REPLICA
+        User.objects.create(username="written")
+        assert routers.wrote_to_primary()
+        assert read_from() == PRIMARY
+        assert User.objects.filter(username="written").exists()
+    assert User.objects.using(PRIMARY).filter(username="written").exists()
+    assert not User.objects.using(REPLICA).filter(username="written").exists()
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        lambda: User.objects.get_or_create(username="on-primary"),
+        lambda: list(User.objects.select_for_update().filter(username="on-primary")),
+    ],
+)
+def test_asking_for_the_write_alias_without_writing_does_not_pin(query):
+    with routers.replica_reads():
+        with transaction.atomic():
+            query()
+        assert not routers.wrote_to_primary()
+        assert read_from() == REPLICA
+
+
+def test_updates_pin_to_the_primary():
+    with routers.replica_reads():
+        User.objects.filter(username="on-primary").update(first_name="updated")
+        assert routers.wrote_to_primary()
+        assert read_from() == PRIMARY
+
+
+def test_the_write_pin_does_not_leak_out_of_the_context():
+    with routers.replica_reads():
+        User.objects.create(username="written")
+    with routers.replica_reads():
+        assert not routers.wrote_to_primary()
+        assert read_from() == REPLICA
+
+
+def test_reads_in_a_transaction_use_the_primary():
+    with routers.replica_reads():
+        with transaction.atomic():
+            assert read_from() == PRIMARY
+        assert read_from() == REPLICA
+
+
+@pytest.mark.parametrize("model", [Session])
+def test_primary_app_labels_never_use_the_replica(model):
+    assert model._meta.app_label in routers.PRIMARY_APP_LABELS
+    with routers.replica_reads():
+        assert router.db_for_read(model) == PRIMARY
+        assert router.db_for_read(User) == REPLICA
+
+
+def test_the_replica_is_never_migrated():
+    assert router.allow_migrate(REPLICA, "auth") is False
+    assert router.allow_migrate(PRIMARY, "auth") is True
+
+
+def test_relations_between_primary_and_replica_objects_are_allowed():
+    primary_user = User.objects.using(PRIMARY).get(username="on-primary")
+    replica_user = User.objects.using(REPLICA).get(username="on-replica")
+    assert router.allow_relation(primary_user, replica_user)
+
+
+@pytest.mark.parametrize(
+    "lag, expected",
+    [
+        (0, REPLICA),
+        (5, REPLICA),
+        (6, PRIMARY),
+        # Replication stopped or broken
+        (None, PRIMARY),
+    ],
+)
+def test_reads_use_the_primary_while_the_replica_lags(monkeypatch, lag, expected):
+    monkeypatch.setattr(routers, "replication_lag", lambda: lag)
+    with replica_settings(MAX_LAG=5), routers.replica_reads():
+        assert router.db_for_read(User) == expected
+
+
+def test_reads_use_the_primary_when_the_replica_is_down():
+    # SQLite has no SHOW REPLICA STATUS: the lag check fails like it does
+    # against an unreachable replica
+    with replica_settings(MAX_LAG=5), routers.replica_reads():
+        assert router.db_for_read(User) == PRIMARY
+
+
+def test_the_lag_is_checked_once_per_interval(monkeypatch):
+    checks = []
+
+    def replication_lag():
+        checks.append(1)
+        return 0
+
+    monkeypatch.setattr(routers, "replication_lag", replication_lag)
+    with replica_settings(MAX_LAG=5, LAG_CHECK_INTERVAL=60), routers.replica_reads():
+        for _ in range(3):
+            assert router.db_for_read(User) == REPLICA
+    assert len(checks) == 1
+
+
+def test_a_replica_user_without_replication_client_skips_the_lag_check(monkeypatch):
+    checks = []
+
+    def replication_lag():
+        checks.append(1)
+        raise OperationalError(routers.ACCESS_DENIED_ERROR, "Access denied; you need the REPLICATION CLIENT privilege")
+
+    monkeypatch.setattr(routers, "replication_lag", replication_lag)
+    with replica_settings(MAX_LAG=5, LAG_CHECK_INTERVAL=0), routers.replica_reads():
+        for _ in range(3):
+            assert router.db_for_read(User) == REPLICA
+    assert len(checks) == 1
+
+
+class TestMiddleware:
+    def handle(self, request, view=None):
+        routed = {}
+
+        def get_response(request):
+            routed["read"] = router.db_for_read(User)
+            if view:
+                view()
+            return HttpResponse()
+
+        response = routers.ReadReplicaMiddleware(get_response)(request)
+        return routed["read"], response
+
+    def test_safe_requests_to_the_paths_read_from_the_replica(self):
+        read, response = self.handle(RequestFactory().get("/api/v1/learner-licenses/"))
+        assert read == REPLICA
+        assert routers.PIN_COOKIE_NAME not in response.cookies
+
+    @pytest.mark.parametrize("method", ["post", "put", "patch", "delete"])
+    def test_unsafe_requests_read_from_the_primary(self, method):
+        read, _response = self.handle(getattr(RequestFactory(), method)("/api/v1/subscriptions/"))
+        assert read == PRIMARY
+
+    def test_other_paths_read_from_the_primary(self):
+        read, _response = self.handle(RequestFactory().get("/login"))
+        assert read == PRIMARY
+
+    def test_a_write_pins_the_client_to_the_primary(self):
+        _read, response = self.handle(
+            RequestFactory().get("/api/v1/learner-licenses/"),
+            view=lambda: User.objects.create(username="written"),
+        )
+        cookie = response.cookies[routers.PIN_COOKIE_NAME]
+        assert cookie["max-age"] == settings.TUTOR_READ_REPLICA["PIN_SECONDS"]
+        assert cookie["httponly"]
+
+        request = RequestFactory().get("/api/v1/learner-licenses/")
+        request.COOKIES[routers.PIN_COOKIE_NAME] = "1"
+        read, _response = self.handle(request)
+        assert read == PRIMARY
+
+    def test_get_or_create_of_an_existing_row_does_not_pin(self):
+        # Like JwtAuthentication on every API request
+        read, response = self.handle(
+            RequestFactory().get("/api/v1/learner-licenses/"),
+            view=lambda: User.objects.get_or_create(username="on-primary"),
+        )
+        assert read == REPLICA
+        assert routers.PIN_COOKIE_NAME not in response.cookies
+
+    def test_no_pin_cookie_when_pinning_is_disabled(self):
+        with replica_settings(PIN_SECONDS=0):
+            _read, response = self.handle(
+                RequestFactory().get("/api/v1/learner-licenses/"),
+                view=lambda: User.objects.create(username="written"),
+            )
+        assert routers.PIN_COOKIE_NAME not in response.cookies
+
+
+def test_listed_celery_tasks_read_from_the_replica():
+    with replica_settings(CELERY_TASKS=["reports.export"]):
+        routers._task_prerun("1", sender=SimpleNamespace(name="other.task"))  # pylint: disable=protected-access
+        assert router.db_for_read(User) == PRIMARY
+        routers._task_postrun("1", sender=SimpleNamespace(name="other.task"))  # pylint: disable=protected-access
+        routers._task_prerun("2", sender=SimpleNamespace(name="reports.export"))  # pylint: disable=protected-access
+        assert router.db_for_read(User) == REPLICA
+        User.objects.create(username="written")
+        assert router.db_for_read(User) == PRIMARY
+        routers._task_postrun("2", sender=SimpleNamespace(name="reports.export"))  # pylint: disable=protected-access
+        assert router.db_for_read(User) == PRIMARY
+        assert not routers.wrote_to_primary()
+        routers._task_prerun("3", sender=SimpleNamespace(name="reports.export"))  # pylint: disable=protected-access
+        assert router.db_for_read(User) == REPLICA
+        routers._task_postrun("3", sender=SimpleNamespace(name="reports.export"))  # pylint: disable=protected-access
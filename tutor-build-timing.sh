@@ -0,0 +1,50 @@
+#!/bin/bash
+#------------------------------------------------------------------------------
+# usage:      compare cold and warm build times of the license-manager image.
+#             Run it from any environment where `tutor images build` works,
+#             with the license_manager plugin enabled:
+#
+#               ./tutor-build-timing.sh
+#
+#             Three builds are timed:
+#             - cold: no layer cache (--no-cache) and no BuildKit cache
+#               mounts, so apt and pip download everything again. The cache
+#               mounts of every build on this builder are pruned first.
+#             - warm: nothing changed, every layer comes from the cache
+#             - code: a fresh clone of license-manager; the python
+#               requirements layers are reused unless the requirements
+#               files themselves changed
+#
+#             Build logs are written to ./build-timing-<scenario>.log
+#------------------------------------------------------------------------------
+set -e
+
+SERVICE_NAME="license-manager"
+export DOCKER_BUILDKIT=1
+
+declare -A DURATIONS
+
+time_build() {
+    local scenario=$1
+    shift
+    echo "building ${SERVICE_NAME} (${scenario})..."
+    SECONDS=0
+    tutor images build ${SERVICE_NAME} "$@" > "build-timing-${scenario}.log" 2>&1
+    DURATIONS[$scenario]=$SECONDS
+    echo "  ${scenario}: ${SECONDS}s"
+}
+
+tutor config save > /dev/null
+
+# --no-cache does not empty the apt and pip cache mounts
+docker builder prune --force --filter type=exec.cachemount > /dev/null
+time_build cold --no-cache
+time_build warm
+time_build code --build-arg "LICENSE_MANAGER_CODE_CACHE_BUST=$(date +%s)"
+
+echo
+echo "license-manager image build times"
+echo "---------------------------------"
+printf "%-6s %8ss\n" cold "${DURATIONS[cold]}"
+printf "%-6s %8ss\n" warm "${DURATIONS[warm]}"
+printf "%-6s %8ss\n" code "${DURATIONS[code]}"
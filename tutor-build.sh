@@ -68,18 +68,32 @@ tutor config save --set "LICENSE_MANAGER_LMS_HOST=${LMS_HOST}" \
 
 # Docker build / AWS ECR upload
 # ----------------------------------------------
+# With LICENSE_MANAGER_CONTENT_TAG, the image tag printed by `tutor images printtag`
+# ends with a hash of the build inputs: when ECR already has an image with this
+# tag, nothing changed since it was pushed and there is nothing to build or push.
 TUTOR_VERSION=$(tutor --version | cut -f3 -d' ')
 AWS_ECR_REPOSITORY=${SERVICE_NAME}
-REPOSITORY_TAG="${TUTOR_VERSION}-$(date +%Y%m%d%H%M)"
 AWS_ECR_REPOSITORY_URL="${AWS_ECR_REGISTRY}/${AWS_ECR_REPOSITORY}"
 
-DOCKER_IMAGE="${AWS_ECR_REPOSITORY_URL}:${REPOSITORY_TAG}"
 DOCKER_IMAGE_LATEST="${AWS_ECR_REPOSITORY_URL}:latest"
 
-tutor config save --set "LICENSE_MANAGER_DOCKER_IMAGE=${DOCKER_IMAGE}"
+tutor config save --set "LICENSE_MANAGER_CONTENT_TAG=true" \
+                  --set "LICENSE_MANAGER_BUILT_IMAGE=${AWS_ECR_REPOSITORY_URL}:${TUTOR_VERSION}" \
+                  --unset LICENSE_MANAGER_DOCKER_IMAGE
+
+DOCKER_IMAGE=$(tutor images printtag ${SERVICE_NAME})
+REPOSITORY_TAG=${DOCKER_IMAGE##*:}
 
-tutor images build ${SERVICE_NAME}
-tutor images push ${SERVICE_NAME}
+if aws ecr describe-images --region $AWS_REGION --repository-name ${AWS_ECR_REPOSITORY} --image-ids imageTag=${REPOSITORY_TAG} > /dev/null 2>&1; then
+    echo "${DOCKER_IMAGE} is up to date in AWS ECR, nothing to build or push"
+else
+    tutor images build ${SERVICE_NAME}
+    tutor images push ${SERVICE_NAME}
 
-docker tag ${DOCKER_IMAGE} ${DOCKER_IMAGE_LATEST}
-docker push ${DOCKER_IMAGE_LATEST}
+    docker tag ${DOCKER_IMAGE} ${DOCKER_IMAGE_LATEST}
+    docker push ${DOCKER_IMAGE_LATEST}
+fi
+
+# Deploy exactly this image: later `tutor k8s` commands must not point to a tag
+# computed from newer commits, that was never built nor pushed.
+tutor config save --set "LICENSE_MANAGER_DOCKER_IMAGE=${DOCKER_IMAGE}"
@@ -0,0 +1,80 @@
+#!/bin/bash
+#------------------------------------------------------------------------------
+# usage:      report the size of license-manager images and how long a new
+#             container takes to answer its first request. Run it from any
+#             environment where `tutor config save` works, with the
+#             license_manager plugin enabled:
+#
+#               ./tutor-image-report.sh                 # the image Tutor runs
+#               ./tutor-image-report.sh IMAGE [IMAGE...] # e.g. before/after
+#
+#             For each image:
+#             - size: uncompressed size, number of layers, and the gzip size
+#               of the image, which is roughly what a new node pulls
+#             - first 200: seconds from `docker run` until /healthz answers
+#               200, i.e. Gunicorn and Django are up. The container uses the
+#               rendered Tutor settings and gunicorn.conf.py, like
+#               `tutor local`, but runs outside of the platform: /healthz
+#               does not touch the database.
+#------------------------------------------------------------------------------
+set -e
+
+SERVICE_NAME="license-manager"
+TIMEOUT=120
+
+tutor config save > /dev/null
+IMAGES=("$@")
+if [ ${#IMAGES[@]} -eq 0 ]; then
+    IMAGE=$(tutor config printvalue LICENSE_MANAGER_DOCKER_IMAGE)
+    IMAGES=("${IMAGE:-$(tutor config printvalue LICENSE_MANAGER_BUILT_IMAGE)}")
+fi
+APP_DIR="$(tutor config printroot)/env/plugins/license_manager/apps/license_manager"
+
+now_ms() {
+    echo $(($(date +%s%N) / 1000000))
+}
+
+# Print the seconds until the first 200, or "-"
+wait_for_200() {
+    local container=$1 started=$2 port status
+    port=$(docker port "$container" 8000/tcp | head -n 1 | cut -d: -f2)
+    while [ $(($(now_ms) - started)) -lt $((TIMEOUT * 1000)) ]; do
+        status=$(curl --silent --output /dev/null --write-out "%{http_code}" "http://127.0.0.1:${port}/healthz" || true)
+        if [ "$status" = "200" ]; then
+            local elapsed=$(($(now_ms) - started))
+            printf "%d.%03d" $((elapsed / 1000)) $((elapsed % 1000))
+            return
+        fi
+        if [ -z "$(docker ps --quiet --filter id="${container}")" ]; then
+            break
+        fi
+        sleep 0.1
+    done
+    echo "no 200 from ${container}, logs:" >&2
+    docker logs "$container" >&2 || true
+    echo "-"
+}
+
+time_to_first_200() {
+    local image=$1 container started
+    started=$(now_ms)
+    container=$(docker run --detach --publish 127.0.0.1::8000 \
+        --env DJANGO_SETTINGS_MODULE=license_manager.settings.tutor.production \
+        --env SERVICE_VARIANT=license_manager \
+        --volume "${APP_DIR}/settings:/openedx/license_manager/license_manager/settings/tutor:ro" \
+        --volume "${APP_DIR}/gunicorn.conf.py:/openedx/gunicorn.conf.py:ro" \
+        "$image" gunicorn --config /openedx/gunicorn.conf.py license_manager.wsgi:application)
+    wait_for_200 "$container" "$started"
+    docker rm --force "$container" > /dev/null
+}
+
+echo "${SERVICE_NAME} image report"
+echo "----------------------------"
+printf "%-60s %10s %7s %10s %10s\n" image "size (MB)" layers "gzip (MB)" "first 200"
+for image in "${IMAGES[@]}"; do
+    size=$(docker image inspect --format "{{.Size}}" "$image")
+    layers=$(docker image inspect --format "{{len .RootFS.Layers}}" "$image")
+    compressed=$(docker save "$image" | gzip -1 | wc -c)
+    first_200=$(time_to_first_200 "$image")
+    printf "%-60s %10d %7d %10d %9ss\n" "$image" $((size / 1000000)) "$layers" $((compressed / 1000000)) "$first_200"
+done
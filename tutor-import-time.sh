@@ -0,0 +1,47 @@
+#!/bin/bash
+#------------------------------------------------------------------------------
+# usage:      measure how long Python takes to import this plugin, which
+#             every `tutor` command does, and fail when the median of RUNS
+#             imports is above LIMIT_MS, e.g. in CI:
+#
+#               ./tutor-import-time.sh
+#               RUNS=10 LIMIT_MS=10 ./tutor-import-time.sh
+#
+#             The modules that tutor imports before loading its plugins are
+#             imported first, so only the cost of the plugin is counted. The
+#             slowest modules that the plugin imports are listed.
+#------------------------------------------------------------------------------
+set -e
+
+PYTHON=${PYTHON:-python}
+RUNS=${RUNS:-5}
+LIMIT_MS=${LIMIT_MS:-20}
+
+LOG=$(mktemp)
+trap 'rm -f "$LOG"' EXIT
+
+import_time() {
+    $PYTHON -X importtime -c "import tutor.commands.cli; import license_manager.plugin" 2> "$LOG" > /dev/null
+    # "import time: self [us] | cumulative | imported package"
+    awk -F'|' '$3 == " license_manager.plugin" { print $2 + 0 }' "$LOG"
+}
+
+# The first import writes the bytecode of the plugin, like `pip install` does:
+# it is not counted
+env -u PYTHONDONTWRITEBYTECODE $PYTHON -c "import license_manager.plugin" > /dev/null
+TIMES=$(for _ in $(seq "$RUNS"); do import_time; done | sort -n)
+MEDIAN_US=$(echo "$TIMES" | awk '{ times[NR] = $1 } END { print times[int((NR + 1) / 2)] }')
+
+echo "license_manager.plugin import time"
+echo "----------------------------------"
+echo "slowest modules (self, ms):"
+sed -n '/| tutor.commands.cli$/,/| license_manager.plugin$/p' "$LOG" | tail -n +2 \
+    | awk -F'|' '{ split($1, self, ":"); printf "  %8.1f %s\n", self[2] / 1000, $3 }' \
+    | sort -rn | head -n 5
+echo "runs (ms):    $(echo "$TIMES" | awk '{ printf "%.1f ", $1 / 1000 }')"
+echo "median (ms):  $(awk -v us="$MEDIAN_US" 'BEGIN { printf "%.1f", us / 1000 }') (limit: ${LIMIT_MS})"
+
+if [ "$MEDIAN_US" -gt $((LIMIT_MS * 1000)) ]; then
+    echo "license_manager.plugin takes more than ${LIMIT_MS}ms to import" >&2
+    exit 1
+fi